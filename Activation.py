@@ -0,0 +1,184 @@
+"""This module contains the activation functions a neurode can use.
+
+Every activation has a scalar path, used by the neurodes one value at a
+time, and a vectorized NumPy path, used by the MatrixEngine for whole
+layers and batches. The derivative of each activation is calculated
+from the value the neurode already stored on the forward pass, so it
+never has to be worked out from the weighted sum again.
+"""
+
+import math
+from abc import ABC, abstractmethod
+import numpy as np
+
+
+class Activation(ABC):
+    """Activation function of a neurode."""
+
+    name = None
+
+    @staticmethod
+    @abstractmethod
+    def value(weighted_sum: float):
+        """Calculate the activation of one weighted sum.
+
+        :param weighted_sum: weighted sum of the upstream values
+        :return: float
+        """
+        pass
+
+    @staticmethod
+    @abstractmethod
+    def derivative(value: float):
+        """Calculate the derivative from the stored activation.
+
+        :param value: the value returned by value()
+        :return: float
+        """
+        pass
+
+    @staticmethod
+    @abstractmethod
+    def values(weighted_sums: np.ndarray, out=None):
+        """Calculate the activation of every element of an array.
+
+        :param weighted_sums: array of weighted sums
+        :param out: optional array to hold the result; it may be
+            weighted_sums itself
+        :return: array of activations
+        """
+        pass
+
+    @staticmethod
+    @abstractmethod
+    def derivatives(values: np.ndarray):
+        """Calculate the derivatives from an array of activations.
+
+        :param values: array returned by values()
+        :return: array of derivatives
+        """
+        pass
+
+
+class Sigmoid(Activation):
+    """Logistic function, calculated with a single exponential.
+
+    The exponent is never positive, so large weighted sums cannot
+    overflow.
+    """
+
+    name = "sigmoid"
+
+    @staticmethod
+    def value(weighted_sum: float):
+        if weighted_sum >= 0:
+            return 1 / (1 + math.exp(-weighted_sum))
+        exp_value = math.exp(weighted_sum)
+        return exp_value / (1 + exp_value)
+
+    @staticmethod
+    def derivative(value: float):
+        return value * (1 - value)
+
+    @staticmethod
+    def values(weighted_sums: np.ndarray, out=None):
+        is_positive = weighted_sums >= 0
+        out = np.abs(weighted_sums, out=out)
+        np.negative(out, out=out)
+        np.exp(out, out=out)
+        numerators = np.where(is_positive, 1.0, out)
+        out += 1
+        return np.divide(numerators, out, out=out)
+
+    @staticmethod
+    def derivatives(values: np.ndarray):
+        return values * (1 - values)
+
+
+class Tanh(Activation):
+    """Hyperbolic tangent."""
+
+    name = "tanh"
+
+    @staticmethod
+    def value(weighted_sum: float):
+        return math.tanh(weighted_sum)
+
+    @staticmethod
+    def derivative(value: float):
+        return 1 - value * value
+
+    @staticmethod
+    def values(weighted_sums: np.ndarray, out=None):
+        return np.tanh(weighted_sums, out=out)
+
+    @staticmethod
+    def derivatives(values: np.ndarray):
+        return 1 - values * values
+
+
+class ReLU(Activation):
+    """Rectified linear unit."""
+
+    name = "relu"
+
+    @staticmethod
+    def value(weighted_sum: float):
+        return weighted_sum if weighted_sum > 0 else 0.0
+
+    @staticmethod
+    def derivative(value: float):
+        return 1.0 if value > 0 else 0.0
+
+    @staticmethod
+    def values(weighted_sums: np.ndarray, out=None):
+        return np.maximum(weighted_sums, 0.0, out=out)
+
+    @staticmethod
+    def derivatives(values: np.ndarray):
+        return (values > 0).astype(float)
+
+
+class LeakyReLU(Activation):
+    """Rectified linear unit that lets a small slope through below 0."""
+
+    name = "leaky_relu"
+    slope = 0.01
+
+    @classmethod
+    def value(cls, weighted_sum: float):
+        return weighted_sum if weighted_sum > 0 else cls.slope * weighted_sum
+
+    @classmethod
+    def derivative(cls, value: float):
+        return 1.0 if value > 0 else cls.slope
+
+    @classmethod
+    def values(cls, weighted_sums: np.ndarray, out=None):
+        slopes = np.where(weighted_sums > 0, 1.0, cls.slope)
+        return np.multiply(weighted_sums, slopes, out=out)
+
+    @classmethod
+    def derivatives(cls, values: np.ndarray):
+        return np.where(values > 0, 1.0, cls.slope)
+
+
+activations = {activation.name: activation
+               for activation in (Sigmoid, Tanh, ReLU, LeakyReLU)}
+
+
+def get_activation(activation):
+    """Look up an activation by name, or check an activation class.
+
+    :param activation: a name from activations, or an Activation
+        subclass
+    :return: an Activation subclass
+    :raises ValueError: if activation is not a known activation
+    """
+    if isinstance(activation, str):
+        if activation not in activations:
+            raise ValueError
+        return activations[activation]
+    if isinstance(activation, type) and issubclass(activation, Activation):
+        return activation
+    raise ValueError
@@ -8,6 +8,8 @@ from Neurode import Neurode
 
 class BPNeurode(Neurode):
 
+    __slots__ = ('_delta',)
+
     def __init__(self):
         """Implement the BPNeurode class."""
 
@@ -19,35 +21,22 @@ class BPNeurode(Neurode):
         """Return delta."""
         return self._delta
 
-    @staticmethod
-    def _sigmoid_derivative(value: float):
-        """Calculate the sigmoid derivative.
-
-        Take in the value of the neurode. Multiply the value of the
-        neurode by one minus the value of the neurode.
-
-        :param value: a float representing the value of the neurode
-        :return: a float that represents the sigmoid derivative
-        """
-        sigmoid_derivative = value * (1 - value)
-        return sigmoid_derivative
-
     def _calculate_delta(self, expected_value: float = None):
         """Calculate the delta of this neurode.
 
         :param expected_value:
         """
-        if not self._neighbors[self.Side.DOWNSTREAM]:
+        if not self._downstream_neighbors:
             self._delta = ((expected_value - self._value) *
-                           self._sigmoid_derivative(self._value))
+                           self._activation.derivative(self._value))
         else:
             weighted_sum = 0
-            for node in self._neighbors[self.Side.DOWNSTREAM]:
+            for node in self._downstream_neighbors:
                 downstream_delta = node.delta
                 weight = node.get_weight(self)
                 weighted_sum += downstream_delta * weight
                 self._delta = (weighted_sum *
-                               self._sigmoid_derivative(self.value))
+                               self._activation.derivative(self.value))
 
     def data_ready_downstream(self, node: Neurode):
         """Check in the node.
@@ -63,14 +52,17 @@ class BPNeurode(Neurode):
             self._fire_upstream()
             self._update_weights()
 
-    def set_expected(self, expected_value: float):
+    def set_expected(self, expected_value: float, propagate=True):
         """Directly set the expected value of an output layer neurode.
 
         Call self._calculate_delta and pass in the expected value.
         :param expected_value: user value
+        :param propagate: False to only calculate the delta, leaving the
+        upstream neighbors to be calculated by LayerList.backward
         """
         self._calculate_delta(expected_value)
-        self._fire_upstream()
+        if propagate:
+            self._fire_upstream()
 
     def adjust_weights(self, node: Neurode, adjustment: float):
         """Change the upstream node weight.
@@ -78,15 +70,15 @@ class BPNeurode(Neurode):
         :param node: Neurode
         :param adjustment: the value to adjust the weight by adjustment
         """
-        self._weights[node] += adjustment
+        self._weights[self._upstream_neighbors.positions[node]] += adjustment
 
     def _update_weights(self):
         """Calculate the weight adjustment."""
-        for node in self._neighbors[self.Side.DOWNSTREAM]:
+        for node in self._downstream_neighbors:
             adjustment = node.learning_rate * node.delta * self.value
             node.adjust_weights(self, adjustment)
 
     def _fire_upstream(self):
         """Call data_ready_downstream for each Upstream neighbor"""
-        for node in self._neighbors[self.Side.UPSTREAM]:
+        for node in self._upstream_neighbors:
             node.data_ready_downstream(self)
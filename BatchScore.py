@@ -0,0 +1,152 @@
+"""This module scores a file of samples with a saved network.
+
+    python -m BatchScore model.npz samples.csv predictions.csv
+
+The samples, a CSV file or a .npy file with one sample per row, are
+read and scored a chunk of rows at a time, and the outputs of each
+chunk are written before the next is read, so memory use does not grow
+with the size of the input. The predictions are written as CSV, or as
+a .npy file if the output name ends in .npy. NumPy and the network are
+only imported once the arguments are known to be good, so --help and
+argument errors come back at once.
+"""
+
+import argparse
+import os
+import shutil
+import sys
+
+
+def _parse_arguments(arguments=None):
+    """Parse the command line.
+
+    :param arguments: list of arguments, or None for sys.argv
+    :return: argparse.Namespace
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m BatchScore",
+        description="Score a CSV or .npy file of samples with a network "
+                    "saved by FFBPNetwork.save.")
+    parser.add_argument("model", help="file written by FFBPNetwork.save")
+    parser.add_argument("input", help="CSV or .npy file, one sample per row")
+    parser.add_argument("output",
+                        help="file to write, as .npy if its name ends in "
+                             ".npy and as CSV otherwise")
+    parser.add_argument("--chunk-size", type=int, default=4096,
+                        help="number of rows scored at once")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="threads scoring each chunk, one per core "
+                             "by default")
+    parser.add_argument("--delimiter", default=",",
+                        help="character between the columns of a CSV")
+    parser.add_argument("--header", action="store_true",
+                        help="skip the first row of the input CSV")
+    parser.add_argument("--label-columns", type=int, nargs="*", default=[],
+                        help="columns of the input CSV to leave out, such "
+                             "as the labels of a training file")
+    args = parser.parse_args(arguments)
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if not os.path.exists(args.model):
+        parser.error(f"no such model: {args.model}")
+    if not os.path.exists(args.input):
+        parser.error(f"no such input: {args.input}")
+    return args
+
+
+def _read_chunks(args):
+    """Yield the samples of the input file a chunk at a time.
+
+    :param args: the parsed command line
+    :return: generator of 2-D arrays
+    """
+    import numpy as np
+    from NNData import NNData
+
+    if args.input.endswith(".npy"):
+        samples = np.load(args.input, mmap_mode="r")
+        if samples.ndim == 1:
+            samples = samples.reshape(-1, 1)
+        for start in range(0, len(samples), args.chunk_size):
+            yield samples[start:start + args.chunk_size]
+    else:
+        for features, _ in NNData.read_csv_chunks(
+                args.input, args.label_columns, args.chunk_size,
+                args.delimiter, args.header, float):
+            yield features
+
+
+def _write_npy(path, raw_file, num_rows, num_columns):
+    """Write a .npy file from a raw file of float rows, a block at a time.
+
+    :param path: .npy file to write
+    :param raw_file: open raw file, positioned anywhere
+    :param num_rows: number of rows in raw_file
+    :param num_columns: number of values per row
+    """
+    import numpy as np
+
+    with open(path, "wb") as npy_file:
+        np.lib.format.write_array_header_1_0(
+            npy_file, {"descr": np.lib.format.dtype_to_descr(
+                           np.dtype(float)),
+                       "fortran_order": False,
+                       "shape": (num_rows, num_columns)})
+        raw_file.seek(0)
+        shutil.copyfileobj(raw_file, npy_file)
+
+
+def score_file(args):
+    """Score every chunk of the input and write the outputs.
+
+    :param args: the parsed command line
+    :return: number of samples scored
+    :raises ValueError: if the model file does not hold a network or a
+        sample does not have one value per input neurode
+    """
+    import numpy as np
+    from FFBPNetwork2 import FFBPNetwork
+
+    network = FFBPNetwork.load(args.model)
+    # outputs of each chunk are written into the same buffer
+    outputs = np.empty((args.chunk_size, network.num_outputs))
+    workers = args.workers or os.cpu_count() or 1
+    as_npy = args.output.endswith(".npy")
+    num_rows = 0
+    raw_path = f"{args.output}.tmp"
+    try:
+        with open(raw_path if as_npy else args.output, "wb+") as \
+                output_file:
+            for samples in _read_chunks(args):
+                # one shard per worker, so every chunk uses all of them
+                shard_size = max(1, -(-len(samples) // workers))
+                chunk_outputs = network.score(samples, workers, shard_size,
+                                              out=outputs[:len(samples)])
+                if as_npy:
+                    output_file.write(chunk_outputs.tobytes())
+                else:
+                    np.savetxt(output_file, chunk_outputs,
+                               delimiter=args.delimiter)
+                num_rows += len(samples)
+            if as_npy:
+                _write_npy(args.output, output_file, num_rows,
+                           network.num_outputs)
+    finally:
+        if as_npy and os.path.exists(raw_path):
+            os.remove(raw_path)
+    return num_rows
+
+
+def main(arguments=None):
+    args = _parse_arguments(arguments)
+    try:
+        num_rows = score_file(args)
+    except ValueError:
+        sys.exit(f"could not score {args.input} with {args.model}")
+    print(f"Scored {num_rows} samples into {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""This module contains the Checkpointer class.
+
+A Checkpointer writes snapshots of a training run to a file on a
+background thread, so the training loop hands a snapshot over and
+carries on without waiting for the disk.
+"""
+
+import os
+import threading
+import numpy as np
+
+
+class Checkpointer:
+    """Write checkpoints to one file on a background thread."""
+
+    @staticmethod
+    def write(path, arrays: dict):
+        """Write arrays to path as a NumPy .npz archive, atomically.
+
+        The archive is written and flushed to disk under another name
+        and then renamed over path, so path always holds a whole
+        checkpoint.
+
+        :param path: file to write
+        :param arrays: dictionary of names to arrays
+        """
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as checkpoint_file:
+            np.savez(checkpoint_file, **arrays)
+            checkpoint_file.flush()
+            os.fsync(checkpoint_file.fileno())
+        os.replace(temp_path, path)
+
+    def __init__(self, path):
+        """Create a Checkpointer and start its writer thread.
+
+        :param path: file the checkpoints are written to
+        """
+        self._path = path
+        self._pending = None
+        self._closed = False
+        self._error = None
+        self._condition = threading.Condition()
+        self._writer = threading.Thread(target=self._write_pending,
+                                        daemon=True)
+        self._writer.start()
+
+    def _write_pending(self):
+        """Write each snapshot handed over until the Checkpointer closes."""
+        while True:
+            with self._condition:
+                while self._pending is None and not self._closed:
+                    self._condition.wait()
+                if self._pending is None:
+                    return
+                arrays = self._pending
+                self._pending = None
+            try:
+                Checkpointer.write(self._path, arrays)
+            except OSError as error:
+                self._error = error
+
+    def submit(self, arrays: dict):
+        """Hand a snapshot over to be written.
+
+        If the snapshot before it has not been written yet, it is
+        replaced, since only the latest checkpoint is kept.
+
+        :param arrays: dictionary of names to arrays, which must not be
+            changed afterwards
+        """
+        with self._condition:
+            self._pending = arrays
+            self._condition.notify()
+
+    def close(self):
+        """Write the last snapshot and stop the writer thread.
+
+        :raises OSError: if a checkpoint could not be written
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._writer.join()
+        if self._error is not None:
+            raise self._error
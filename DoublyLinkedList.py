@@ -20,6 +20,37 @@ class DoublyLinkedList:
         self._head = None
         self._tail = None
         self._curr = None
+        # the nodes from head to tail, so a position is reached without
+        # walking the links, and the position of the current node
+        self._nodes = []
+        self._curr_position = 0
+
+    def __len__(self):
+        """Return the number of nodes in the list."""
+        return len(self._nodes)
+
+    def __getitem__(self, position: int) -> object:
+        """Return the data at a position, counting from the head.
+
+        :param int position: Position of the node, negative from the tail.
+        :return object: Data contained in the node.
+        :raises IndexError: if there is no node at position.
+        """
+        return self._nodes[position].data
+
+    def _structure_changed(self):
+        """Called after a node is added or removed."""
+        pass
+
+    def __iter__(self):
+        """Iterate over the data from head to tail.
+
+        The current pointer is not moved.
+        """
+        temp_curr = self._head
+        while temp_curr:
+            yield temp_curr.data
+            temp_curr = temp_curr.next
 
     def move_forward(self):
         """Move the current pointer forward through the list.
@@ -29,6 +60,7 @@ class DoublyLinkedList:
         if not self._curr or not self._curr.next:
             raise IndexError
         self._curr = self._curr.next
+        self._curr_position += 1
 
     def move_backward(self):
         """Move the current pointer backward through the list.
@@ -38,6 +70,7 @@ class DoublyLinkedList:
         if not self._curr or not self._curr.prev:
             raise IndexError
         self._curr = self._curr.prev
+        self._curr_position -= 1
 
     def add_to_head(self, data: object):
         """Add a new node containing data to the head of the list.
@@ -50,6 +83,8 @@ class DoublyLinkedList:
         self._head = new_node
         if self._tail is None:
             self._tail = new_node
+        self._nodes.insert(0, new_node)
+        self._structure_changed()
         self.reset_to_head()
 
     def remove_from_head(self) -> object:
@@ -65,6 +100,8 @@ class DoublyLinkedList:
             self._head.prev = None
         else:
             self._tail = None
+        del self._nodes[0]
+        self._structure_changed()
         self.reset_to_head()
         return return_val
 
@@ -83,6 +120,8 @@ class DoublyLinkedList:
         self._curr.next = new_node
         if self._tail == self._curr:
             self._tail = new_node
+        self._nodes.insert(self._curr_position + 1, new_node)
+        self._structure_changed()
 
     def remove_after_current(self):
         """Remove the node afgter the current node, returning data.
@@ -99,15 +138,74 @@ class DoublyLinkedList:
         else:
             self._curr.next = self._curr.next.next
             self._curr.next.prev = self._curr
+        del self._nodes[self._curr_position + 1]
+        self._structure_changed()
         return return_value
 
+    def move_to(self, position: int):
+        """Move the current pointer to a position, counting from the head.
+
+        :param int position: Position of the node, negative from the tail.
+        :raises IndexError: if there is no node at position.
+        """
+        self._curr = self._nodes[position]
+        self._curr_position = position % len(self._nodes)
+
+    def insert(self, position: int, data: object):
+        """Add a new node containing data at a position.
+
+        The current pointer is left on the node before the new one, or
+        on the head if the new node is the head.
+
+        :param int position: Position the new node will have.
+        :param object data: Data of any type.
+        :raises IndexError: if position is not between 0 and the length
+            of the list.
+        """
+        if not 0 <= position <= len(self._nodes):
+            raise IndexError
+        if position == 0:
+            self.add_to_head(data)
+        else:
+            self.move_to(position - 1)
+            self.add_after_current(data)
+
+    def remove_at(self, position: int) -> object:
+        """Remove the node at a position, returning data.
+
+        The current pointer is left on the node before the removed one,
+        or on the head if the head was removed.
+
+        :param int position: Position of the node to remove.
+        :return object: Data contained in the removed node.
+        :raises IndexError: if there is no node at position.
+        """
+        if not 0 <= position < len(self._nodes):
+            raise IndexError
+        if position == 0:
+            return self.remove_from_head()
+        self.move_to(position - 1)
+        return self.remove_after_current()
+
     def reset_to_head(self):
         """Reset current pointer to head."""
         self._curr = self._head
+        self._curr_position = 0
 
     def reset_to_tail(self):
         """Reset current pointer to tail."""
         self._curr = self._tail
+        self._curr_position = max(len(self._nodes) - 1, 0)
+
+    @property
+    def curr_position(self) -> int:
+        """Return the position of the current node, counting from the head.
+
+        :return int: Number of nodes before the current node.
+        :raises IndexError: if the list is empty."""
+        if not self._curr:
+            raise IndexError
+        return self._curr_position
 
     @property
     def curr_data(self) -> object:
@@ -121,6 +219,9 @@ class DoublyLinkedList:
     def find(self, data: object) -> object:
         """Find and return an item in the list.
 
+        Items are matched by equality, so the list is searched from the
+        head; use __getitem__ to reach an item by position instead.
+
         :param object data: Key to search for.
         :return object: Full data payload of found node.
         :raises IndexError: if no matching data is found.
@@ -135,6 +236,9 @@ class DoublyLinkedList:
     def remove(self, data):
         """Find and remove an item in the list.
 
+        Items are matched by equality, so the list is searched from the
+        head; use remove_at to remove an item by position instead.
+
         :param object data: Key to search for.
         :return object: Full data payload of removed node.
         :raises IndexError: if no matching data is found.
@@ -143,15 +247,19 @@ class DoublyLinkedList:
             raise IndexError
         if self._head.data == data:
             return self.remove_from_head()
-        temp_curr = self._head
-        while temp_curr.next:
-            if temp_curr.next.data == data:
-                return_value = temp_curr.next.data
-                temp_curr.next = temp_curr.next.next
+        for position, node in enumerate(self._nodes[1:], 1):
+            if node.data == data:
+                temp_curr = node.prev
+                temp_curr.next = node.next
                 if temp_curr.next is None:
                     self._tail = temp_curr
                 else:
                     temp_curr.next.prev = temp_curr
-                return return_value
-            temp_curr = temp_curr.next
+                if self._curr is node:
+                    self._curr = temp_curr
+                if position <= self._curr_position:
+                    self._curr_position -= 1
+                del self._nodes[position]
+                self._structure_changed()
+                return node.data
         raise IndexError
\ No newline at end of file
@@ -5,12 +5,31 @@ demonstrates file handling and JSON custom encoding / decoding.
 """
 
 from __future__ import annotations
-from LayerList import LayerList
+from LayerList import LayerList, WeightInit
 import RMSE
 from NNData import NNData, Order, Set
 from FFBPNeurode import FFBPNeurode
+from MatrixEngine import MatrixEngine
+from Activation import Sigmoid
+from PrefetchLoader import PrefetchLoader
+from Checkpointer import Checkpointer
+from Optimizer import SGD
+from WeightSnapshot import WeightSnapshot
 
 from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+import inspect
+import os
+import zipfile
+import numpy as np
+
+
+class Engine(Enum):
+    """Identify how the network carries out its calculations."""
+
+    NEURODE = 'NEURODE'
+    MATRIX = 'MATRIX'
 
 
 class FFBPNetwork:
@@ -20,74 +39,413 @@ class FFBPNetwork:
         """Custom exception."""
         pass
 
+    # largest number of testing samples scored at once by validation
+    _VALIDATION_BATCH_SIZE = 4096
+
     def __init__(self, num_inputs: int, num_outputs: int,
-                 error_model: type(RMSE)):
+                 error_model: type(RMSE), activation=Sigmoid,
+                 weight_init=WeightInit.UNIFORM, seed=None):
         """Create a neural network.
 
         :param num_inputs: number of input nodes
         :param num_outputs: number of outputs nodes
         :param error_model: the type of RMSE calculation to use
+        :param activation: Activation subclass or name used by the
+            output layer and by default in hidden layers
+        :param weight_init: WeightInit scheme the weights of every
+            layer are drawn with
+        :param seed: seed for the weights, or None for a fresh one
         :return:
         """
         # LayerList.LayerList(num_inputs, num_outputs, error_model)
-        self._network = LayerList(num_inputs, num_outputs, FFBPNeurode)
-        self._num_input_nodes = num_inputs
-        self._num_output_nodes = num_outputs
+        self._use_layers(LayerList(num_inputs, num_outputs, FFBPNeurode,
+                                   activation, weight_init, seed),
+                         error_model)
+
+    def _use_layers(self, layers: LayerList, error_model: type(RMSE)):
+        """Make layers the neurodes of this network.
+
+        :param layers: the LayerList to use
+        :param error_model: the type of RMSE calculation to use
+        """
+        self._network = layers
+        self._num_input_nodes = len(layers.input_nodes)
+        self._num_output_nodes = len(layers.output_nodes)
         self._error_model = error_model
+        self._matrix_engine = None
+        self._snapshot = None
+
+    def save(self, path):
+        """Write the layers and weights of the network to a file.
+
+        The file is a NumPy .npz archive holding the size, activation
+        and learning rates of every layer and one weight matrix per
+        layer after the input layer.
 
-    def add_hidden_layer(self, num_nodes: int, position=0):
+        :param path: file to write
+        """
+        with open(path, "wb") as model_file:
+            np.savez(model_file, **self._saved_arrays())
+
+    def _saved_arrays(self):
+        """Return the arrays save writes, holding copies of the weights.
+
+        :return: dictionary of names to arrays
+        """
+        layers = self._network.layers
+        arrays = {
+            "layer_sizes": np.array(self._network.layer_sizes),
+            "activations": np.array([layer[0].activation.name
+                                     for layer in layers]),
+            "learning_rates": np.array([neurode.learning_rate
+                                        for layer in layers[1:]
+                                        for neurode in layer]),
+            "error_model": np.array(self._error_model.__name__)}
+        for layer_number, weights in enumerate(self._network.weights):
+            arrays[f"weights_{layer_number}"] = weights.copy()
+        return arrays
+
+    def _resume(self, checkpoint_path, data_set: NNData, optimizer=None):
+        """Restore the weights and data state of a checkpoint.
+
+        :param checkpoint_path: checkpoint file written by train
+        :param data_set: the data being trained on
+        :param optimizer: Optimizer to restore the state of, or None
+        :return: tuple of the first epoch still to run, the best epoch
+            and its error so far, or None, and the number of checks
+            since the error last improved
+        :raises ValueError: if the checkpoint does not fit this network,
+            data_set or optimizer
+        """
+        with np.load(checkpoint_path) as saved:
+            try:
+                all_weights = self._network.weights
+                for layer_number, weights in enumerate(all_weights):
+                    saved_weights = saved[f"weights_{layer_number}"]
+                    if saved_weights.shape != weights.shape:
+                        raise ValueError
+                    weights[...] = saved_weights
+                data_set.set_state(saved)
+                if optimizer is not None:
+                    optimizer.set_state(saved)
+                best_epoch = None
+                best_error = None
+                checks_without_improvement = 0
+                if "best_epoch" in saved and int(saved["best_epoch"]) >= 0:
+                    best_epoch = int(saved["best_epoch"])
+                    best_error = float(saved["best_error"])
+                    checks_without_improvement = int(
+                        saved["checks_without_improvement"])
+                return (int(saved["epoch"]), best_epoch, best_error,
+                        checks_without_improvement)
+            except KeyError as error:
+                raise ValueError from error
+
+    @staticmethod
+    def _progress_arrays(best_epoch, best_error, checks_without_improvement):
+        """Return the early stopping state as arrays for a checkpoint.
+
+        :param best_epoch: epoch with the lowest error so far, or None
+        :param best_error: the lowest error so far, or None
+        :param checks_without_improvement: number of checks since the
+            error last improved
+        :return: dictionary of names to arrays
+        """
+        return {"best_epoch": np.array(-1 if best_epoch is None
+                                       else best_epoch),
+                "best_error": np.array(np.nan if best_error is None
+                                       else best_error),
+                "checks_without_improvement": np.array(
+                    checks_without_improvement)}
+
+    @classmethod
+    def load(cls, path):
+        """Create a network from a file written by save.
+
+        The weight matrices are read straight into the layers, without
+        drawing or setting weights one edge at a time.
+
+        :param path: file to read
+        :return: FFBPNetwork
+        :raises ValueError: if the file does not hold a saved network
+        """
+        try:
+            with np.load(path) as saved:
+                layer_sizes = saved["layer_sizes"].tolist()
+                activations = saved["activations"].tolist()
+                learning_rates = saved["learning_rates"].tolist()
+                error_model = getattr(RMSE, str(saved["error_model"]))
+                weights = [saved[f"weights_{layer_number}"]
+                           for layer_number in range(len(layer_sizes) - 1)]
+        except (KeyError, AttributeError, OSError, EOFError, ValueError,
+                zipfile.BadZipFile) as error:
+            raise ValueError from error
+        if not (isinstance(error_model, type) and
+                issubclass(error_model, RMSE.RMSE) and
+                not inspect.isabstract(error_model)):
+            raise ValueError
+        layers = LayerList.from_weights(weights, FFBPNeurode, activations)
+        neurodes = [neurode for layer in layers.layers[1:]
+                    for neurode in layer]
+        for neurode, learning_rate in zip(neurodes, learning_rates):
+            neurode.learning_rate = learning_rate
+
+        network = cls.__new__(cls)
+        network._use_layers(layers, error_model)
+        return network
+
+    def _compiled_engine(self):
+        """Return a MatrixEngine that shares the neurodes' weights.
+
+        The engine is compiled once and reused until layers are added or
+        a neurode's learning rate or activation is changed.
+        """
+        if self._matrix_engine is None or \
+                not self._matrix_engine.is_current:
+            self._matrix_engine = MatrixEngine(self._network)
+        return self._matrix_engine
+
+    def add_hidden_layer(self, num_nodes: int, position=0, activation=None):
         """Add a hidden layer at the given position
 
         :param num_nodes: number of nodes to add
         :param position: the layer's position in the network
+        :param activation: Activation subclass or name, or None for the
+            network's activation
         :return:
         """
-        num_iterations = 0
-        self._network.reset_to_head()
-        while num_iterations < position:
-            self._network.move_forward()
-            num_iterations += 1
-
-        self._network.add_layer(num_nodes)
+        self._network.insert_layer(position + 1, num_nodes, activation)
+        self._matrix_engine = None
 
     def train(self, data_set: NNData, epochs=1000, verbosity=2,
-              order=Order.SHUFFLE):
+              order=Order.SHUFFLE, engine=Engine.NEURODE, batch_size=1,
+              prefetch=0, checkpoint_path=None, checkpoint_interval=0,
+              resume=False, target_error=None, patience=0, min_delta=0.0,
+              validation_interval=0, optimizer=None, schedule=None,
+              snapshot_interval=0, snapshot_each_epoch=False):
+        """Train the network on the training set of data_set.
+
+        Training stops before epochs is reached once the monitored error
+        is at most target_error, or once it has gone patience checks
+        without improving on the best error by more than min_delta. The
+        monitored error is the training error of each epoch, or, with a
+        validation_interval, the error on the testing set every
+        validation_interval epochs.
+
+        :param data_set: the data to train on
+        :param epochs: number of passes through the training set
+        :param verbosity: how much progress to print
+        :param order: whether to shuffle the training set every epoch
+        :param engine: Engine.NEURODE to pass messages between the
+            neurodes, or Engine.MATRIX to use a MatrixEngine. Both give
+            the same results and train the same weights.
+        :param batch_size: number of samples run through the network
+            together before the weights are updated once. Anything
+            above 1 always uses Engine.MATRIX.
+        :param prefetch: number of batches a PrefetchLoader prepares on
+            a worker thread ahead of the one being trained on, or 0 to
+            prepare each batch when it is needed. Anything above 0
+            always uses Engine.MATRIX.
+        :param checkpoint_path: file checkpoints are written to. A
+            checkpoint holds everything save writes plus the next epoch
+            and the state of data_set's shuffling, and is written on a
+            background thread.
+        :param checkpoint_interval: number of epochs between
+            checkpoints, or 0 for none
+        :param resume: whether to carry on from the checkpoint at
+            checkpoint_path, if there is one, at the epoch it was
+            written after
+        :param target_error: error to stop at, or None to not stop on
+            the error alone
+        :param patience: number of checks in a row the error may fail
+            to improve before training stops, or 0 to never stop for it
+        :param min_delta: how much lower than the best error an error
+            must be to count as an improvement
+        :param validation_interval: number of epochs between checks of
+            the error on the testing set, or 0 to check the training
+            error every epoch
+        :param optimizer: Optimizer that updates the weights, such as
+            Momentum or Adam, or None for the plain gradient descent of
+            the neurodes. Its state is kept in the optimizer, so passing
+            the same one again carries on where it left off, and it is
+            saved in checkpoints. Setting it always uses Engine.MATRIX.
+        :param schedule: Schedule giving the factor the learning rates
+            are multiplied by each epoch, or None to keep them as they
+            are. Setting it always uses Engine.MATRIX.
+        :param snapshot_interval: number of samples trained on between
+            calls to publish_snapshot, or 0 for none
+        :param snapshot_each_epoch: whether to call publish_snapshot at
+            the end of every epoch
+        :return: the epoch with the lowest monitored error, or None if
+            no epoch was run
+        :raises ValueError: if batch_size is less than 1, prefetch,
+            checkpoint_interval, patience, min_delta,
+            validation_interval or snapshot_interval is negative,
+            checkpoint_interval is set without a checkpoint_path,
+            validation_interval is set and the testing set is empty, or
+            the checkpoint to resume from does not fit
+        """
         if not data_set:
             raise FFBPNetwork.EmptySetException
-
+        if batch_size < 1 or prefetch < 0 or checkpoint_interval < 0:
+            raise ValueError
+        if patience < 0 or min_delta < 0 or validation_interval < 0 or \
+                snapshot_interval < 0:
+            raise ValueError
+        if checkpoint_interval > 0 and checkpoint_path is None:
+            raise ValueError
+        if validation_interval > 0 and \
+                data_set.number_of_samples(Set.TEST) == 0:
+            raise ValueError
+
+        if schedule is not None and optimizer is None:
+            optimizer = SGD()
+
+        first_epoch = 0
+        best_epoch = None
+        best_error = None
+        checks_without_improvement = 0
+        if resume and checkpoint_path is not None and \
+                os.path.exists(checkpoint_path):
+            first_epoch, best_epoch, best_error, \
+                checks_without_improvement = self._resume(
+                    checkpoint_path, data_set, optimizer)
+        checkpointer = None
+        if checkpoint_interval > 0:
+            checkpointer = Checkpointer(checkpoint_path)
+
+        matrix_engine = None
+        if engine == Engine.MATRIX or batch_size > 1 or prefetch > 0 or \
+                optimizer is not None:
+            matrix_engine = self._compiled_engine()
+        loader = None
+        if prefetch > 0:
+            loader = PrefetchLoader(data_set, batch_size, order, Set.TRAIN,
+                                    prefetch)
+
+        samples_since_snapshot = 0
         rmse_object = self._error_model()
-        for epoch in range(epochs): # every epoch, weights should change
-            # print(f"epoch number: {epoch}")
-            rmse_object.reset()
-            data_set.prime_data(order=order)
-            # print(f" is training set empty? {?data_set.pool_is_empty(Set.TRAIN)}")
-            while not data_set.pool_is_empty(Set.TRAIN):
-                features, labels = data_set.get_one_item(Set.TRAIN)
-
-                # below presents the feature list to the input neurodes
-                input_neurodes = self._network.input_nodes
-                for input_neurode, feature in zip(input_neurodes, features):
-                    input_neurode.set_input(feature)
-
-                output_neurodes = self._network.output_nodes
-                predicted = [neurode.value for neurode in output_neurodes]
-                rmse_object += (labels, predicted)
-
-                # below presents the expected values to the output neurodes
-                for output_neurode, expected_value in zip(output_neurodes, labels):
-                    output_neurode.set_expected(expected_value)
-
-                if verbosity > 1:
-                    # print(f"Epoch: {epoch % 1000}")
-                    if epoch % 1000 == 0:
-                        print(f"Sample: {features} Expected: {labels} Produced: {predicted}")
-
-            if verbosity > 0:
-                if epoch % 100 == 0:
-                    print(f"Epoch {epoch} RMSE = {rmse_object.error}")
+        try:
+            for epoch in range(first_epoch, epochs): # every epoch, weights should change
+                # print(f"epoch number: {epoch}")
+                rmse_object.reset()
+                if schedule is not None:
+                    optimizer.scale = schedule.factor(epoch)
+                if matrix_engine is not None:
+                    if loader is not None:
+                        batches = loader
+                    else:
+                        batches = data_set.iter_batches(Set.TRAIN, batch_size,
+                                                        order)
+                    for batch_features, batch_labels in batches:
+                        batch_predicted = matrix_engine.forward(batch_features)
+                        rmse_object += (batch_labels, batch_predicted)
+                        matrix_engine.backward(batch_labels, optimizer)
+                        if snapshot_interval > 0:
+                            samples_since_snapshot += len(batch_labels)
+                            if samples_since_snapshot >= snapshot_interval:
+                                self.publish_snapshot()
+                                samples_since_snapshot = 0
+                        if verbosity > 1 and epoch % 1000 == 0:
+                            for features, labels, predicted in zip(
+                                    batch_features, batch_labels,
+                                    batch_predicted):
+                                print(f"Sample: {features} Expected: {labels} Produced: {list(predicted)}")
+                else:
+                    data_set.prime_data(Set.TRAIN, order)
+                    # print(f" is training set empty? {?data_set.pool_is_empty(Set.TRAIN)}")
+                    while not data_set.pool_is_empty(Set.TRAIN):
+                        features, labels = data_set.get_one_item(Set.TRAIN)
+
+                        # below presents the feature list to the input neurodes
+                        predicted = self._network.forward(features)
+                        rmse_object += (labels, predicted)
+
+                        # below presents the expected values to the output neurodes
+                        self._network.backward(labels)
+                        if snapshot_interval > 0:
+                            samples_since_snapshot += 1
+                            if samples_since_snapshot >= snapshot_interval:
+                                self.publish_snapshot()
+                                samples_since_snapshot = 0
+
+                        if verbosity > 1:
+                            # print(f"Epoch: {epoch % 1000}")
+                            if epoch % 1000 == 0:
+                                print(f"Sample: {features} Expected: {labels} Produced: {predicted}")
+
+                if verbosity > 0:
+                    if epoch % 100 == 0:
+                        print(f"Epoch {epoch} RMSE = {rmse_object.error}")
+
+                if snapshot_each_epoch:
+                    self.publish_snapshot()
+
+                if validation_interval == 0:
+                    error = rmse_object.error
+                elif (epoch + 1) % validation_interval == 0:
+                    error = self._validation_error(data_set)
+                    if verbosity > 0:
+                        print(f"Epoch {epoch} validation RMSE = {error}")
+                else:
+                    error = None
+                stop = False
+                if error is not None:
+                    if best_error is None or error < best_error - min_delta:
+                        best_epoch = epoch
+                        best_error = error
+                        checks_without_improvement = 0
+                    else:
+                        checks_without_improvement += 1
+                    stop = ((target_error is not None and
+                             error <= target_error) or
+                            (patience > 0 and
+                             checks_without_improvement >= patience))
+
+                if checkpointer is not None and \
+                        (epoch + 1) % checkpoint_interval == 0:
+                    snapshot = self._saved_arrays()
+                    snapshot.update(data_set.get_state())
+                    if optimizer is not None:
+                        snapshot.update(optimizer.get_state())
+                    snapshot["epoch"] = np.array(epoch + 1)
+                    snapshot.update(FFBPNetwork._progress_arrays(
+                        best_epoch, best_error, checks_without_improvement))
+                    checkpointer.submit(snapshot)
+
+                if stop:
+                    if verbosity > 0:
+                        print(f"Stopped early after epoch {epoch}")
+                    break
+        finally:
+            # a checkpoint handed over before an error or an interrupt
+            # is still written
+            if checkpointer is not None:
+                checkpointer.close()
 
         # Reports the final RMSE
         print(f"Final EPOCH RMSE: {rmse_object.error}")
+        if best_epoch is not None:
+            print(f"Best epoch {best_epoch} RMSE = {best_error}")
+        return best_epoch
+
+    def _validation_error(self, data_set: NNData):
+        """Return the error of the network on the testing set.
+
+        The testing set is run through the MatrixEngine in order, in
+        batches of at most _VALIDATION_BATCH_SIZE samples, so only one
+        batch is held in memory, and the weights and the shuffling of
+        data_set are left alone.
+
+        :param data_set: the data holding the testing set
+        :return: float
+        """
+        matrix_engine = self._compiled_engine()
+        rmse_object = self._error_model()
+        for features, labels in data_set.iter_batches(
+                Set.TEST, FFBPNetwork._VALIDATION_BATCH_SIZE, Order.STATIC):
+            rmse_object += (labels, matrix_engine.predict(features))
+        return rmse_object.error
 
     # Helper Method, maybe use?
     # def present_data(self, data_set: NNData, set_type: Set, rmse_object: RMSE):
@@ -108,6 +466,105 @@ class FFBPNetwork:
     #             output_neurode.set_expected(expected_value)
 
 
+    def publish_snapshot(self):
+        """Publish a read-only copy of the current weights.
+
+        The copy is made first and then swapped in with one assignment,
+        so a thread reading snapshot gets either the old snapshot or
+        the new one, both whole.
+
+        :return: the new WeightSnapshot
+        """
+        version = 0 if self._snapshot is None else self._snapshot.version + 1
+        self._snapshot = WeightSnapshot(
+            self._network.weights,
+            [layer[0].activation for layer in self._network.layers[1:]],
+            version)
+        return self._snapshot
+
+    @property
+    def snapshot(self):
+        """Return the latest WeightSnapshot, or None if none was
+        published.
+
+        Other threads can predict from it while the network trains.
+        """
+        return self._snapshot
+
+    @property
+    def num_inputs(self):
+        """Return the number of input neurodes."""
+        return self._num_input_nodes
+
+    @property
+    def num_outputs(self):
+        """Return the number of output neurodes."""
+        return self._num_output_nodes
+
+    def predict(self, features):
+        """Return the outputs of the network for many samples.
+
+        Only the forward calculation is run, so the weights are never
+        changed.
+
+        :param features: 2-D array-like with one sample per row
+        :return: 2-D array with one row of outputs per sample
+        :raises ValueError: if features is not 2-D or the rows do not
+            have one value per input neurode
+        """
+        features = np.asarray(features, dtype=float)
+        if (features.ndim != 2 or
+                features.shape[1] != self._num_input_nodes):
+            raise ValueError
+        return self._compiled_engine().predict(features)
+
+    def score(self, features, workers=None, shard_size=4096, out=None):
+        """Return the outputs of the network for a large set of samples.
+
+        The samples are split into shards of shard_size rows, and the
+        shards are run on a pool of threads. NumPy releases the GIL
+        during the matrix products, so the shards run on several cores
+        at once. Each shard converts only its own rows to floats and
+        writes its outputs straight into the result, which keeps the
+        samples in their original order.
+
+        :param features: 2-D array-like with one sample per row, such as
+            a memory-mapped file
+        :param workers: number of threads, or None for one per core
+        :param shard_size: largest number of samples in a shard
+        :param out: optional array to receive the outputs; it must have
+            one row per sample and one column per output neurode
+        :return: 2-D array with one row of outputs per sample
+        :raises ValueError: if features is not 2-D, the rows do not have
+            one value per input neurode, out does not fit, or workers or
+            shard_size is less than 1
+        """
+        features = np.asarray(features)
+        if (features.ndim != 2 or
+                features.shape[1] != self._num_input_nodes):
+            raise ValueError
+        if (workers is not None and workers < 1) or shard_size < 1:
+            raise ValueError
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if out is None:
+            out = np.empty((len(features), self._num_output_nodes))
+        elif out.shape != (len(features), self._num_output_nodes):
+            raise ValueError
+        matrix_engine = self._compiled_engine()
+
+        def score_shard(start):
+            stop = start + shard_size
+            matrix_engine.predict(
+                np.asarray(features[start:stop], dtype=float),
+                out=out[start:stop])
+
+        with ThreadPoolExecutor(workers) as executor:
+            # list() waits for every shard and raises what a shard raised
+            list(executor.map(score_shard,
+                              range(0, len(features), shard_size)))
+        return out
+
     def test(self, data_set: NNData, order=Order.STATIC):
         if not data_set:
             raise FFBPNetwork.EmptySetException
@@ -117,17 +574,11 @@ class FFBPNetwork:
         while not data_set.pool_is_empty(Set.TEST):
             features, labels = data_set.get_one_item(Set.TEST)
 
-            input_neurodes = self._network.input_nodes
             # below presents the feature list to the input neurodes
-            for feature, input_neurode in zip(features, input_neurodes):
-                input_neurode.set_input(feature)
-
-            output_neurodes = self._network.output_nodes
-            predicted = [neurode.value for neurode in output_neurodes]
+            predicted = self._network.forward(features)
             rmse_object += (labels, predicted)
             # below presents the expected values to the output neurodes
-            for output_neurode, expected_value in zip(output_neurodes, labels):
-                output_neurode.set_expected(expected_value)
+            self._network.backward(labels)
             print(f"Testing Run Info: Sample: {features} Expected: {labels} Produced: {predicted}")
         print(f"RMSE: {rmse_object.error}")
 
@@ -197,7 +648,8 @@ def run_iris():
               [0, 0, 1, ], [0, 0, 1, ], [0, 0, 1, ], [0, 0, 1, ], [0, 0, 1, ], [0, 0, 1, ], [0, 0, 1, ],
               [0, 0, 1, ], [0, 0, 1, ], [0, 0, 1, ]]
     data = NNData(Iris_X, Iris_Y, .3)
-    network.train(data, 20001, order=Order.SHUFFLE)
+    network.train(data, 20001, order=Order.SHUFFLE,
+                  patience=1000, min_delta=1e-6)
     network.test(data)
 
 
@@ -267,7 +719,8 @@ def run_xor():
     features = [[0, 0], [1, 0], [0, 1], [1, 1]]
     labels = [[0], [1], [1], [0]]
     data = NNData(features, labels, 1)
-    network.train(data, 100001, order=Order.SHUFFLE)
+    network.train(data, 100001, order=Order.SHUFFLE,
+                  patience=1000, min_delta=1e-6)
     network.test(data)
 
 
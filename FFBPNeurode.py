@@ -6,6 +6,9 @@ from BPNeurode import BPNeurode
 
 class FFBPNeurode(BPNeurode, FFNeurode):
     """Implement the FFBPNeurode class."""
+
+    __slots__ = ()
+
     # code below is optional
     def __init__(self):
         super().__init__()
@@ -0,0 +1,256 @@
+"""This module contains the InferenceServer class.
+
+An InferenceServer answers requests for the outputs of a trained
+FFBPNetwork over a Unix socket or a localhost TCP port. Requests that
+arrive together are gathered into micro-batches, and each batch is run
+through the network in one forward pass of its MatrixEngine. A batch is
+run once it holds max_batch_size requests, or once its oldest request
+has waited max_delay seconds, whichever comes first, so busy periods
+get the throughput of large batches while a lone request never waits
+longer than the deadline.
+
+Each request is one line of JSON, {"features": [...]}, and each reply
+is one line of JSON, {"outputs": [...]} or {"error": "..."}. Replies on
+a connection come back in the order of its requests.
+"""
+
+import argparse
+import asyncio
+import json
+import numpy as np
+from FFBPNetwork2 import FFBPNetwork
+
+
+class InferenceServer:
+    """Serve the outputs of a network in micro-batches."""
+
+    class ClosedException(Exception):
+        """Raised for requests that are pending when the server closes."""
+        pass
+
+    def __init__(self, network: FFBPNetwork, max_batch_size=32,
+                 max_delay=0.005):
+        """Create an InferenceServer.
+
+        :param network: the trained network to serve
+        :param max_batch_size: largest number of requests in a batch
+        :param max_delay: longest time in seconds a request waits for
+            its batch to fill up
+        :raises ValueError: if max_batch_size is less than 1 or
+            max_delay is negative
+        """
+        if max_batch_size < 1 or max_delay < 0:
+            raise ValueError
+        self._network = network
+        self._max_batch_size = max_batch_size
+        self._max_delay = max_delay
+        self._requests = None
+        self._batcher = None
+        self._batch = []
+        self._server = None
+        self._connections = {}
+        self._closing = False
+
+    async def start(self, path=None, host="127.0.0.1", port=0):
+        """Start listening and batching.
+
+        :param path: Unix socket to listen on, or None to listen on a
+            TCP port
+        :param host: address of the TCP port
+        :param port: TCP port, or 0 for any free port
+        :return: the asyncio Server, whose sockets give the address
+        """
+        self._requests = asyncio.Queue()
+        self._batcher = asyncio.ensure_future(self._run_batches())
+        if path is not None:
+            self._server = await asyncio.start_unix_server(
+                self._serve_connection, path)
+        else:
+            self._server = await asyncio.start_server(
+                self._serve_connection, host, port)
+        return self._server
+
+    async def close(self):
+        """Stop listening, fail pending requests and close connections.
+
+        Every request still waiting for its batch, or in the batch being
+        run, is answered with an error, and each connection is closed
+        once its replies are written.
+        """
+        self._closing = True
+        if self._server is not None:
+            self._server.close()
+        if self._batcher is not None:
+            self._batcher.cancel()
+            try:
+                await self._batcher
+            except asyncio.CancelledError:
+                pass
+        pending = list(self._batch)
+        while self._requests is not None and not self._requests.empty():
+            pending.append(self._requests.get_nowait())
+        for _, result in pending:
+            if not result.done():
+                result.set_exception(InferenceServer.ClosedException())
+        self._batch = []
+        # ending the input of each connection makes it write its
+        # remaining replies and close
+        for reader in self._connections.values():
+            reader.feed_eof()
+        if self._connections:
+            await asyncio.gather(*self._connections,
+                                 return_exceptions=True)
+        if self._server is not None:
+            await self._server.wait_closed()
+
+    async def predict(self, features):
+        """Return the outputs for one sample once its batch has run.
+
+        :param features: one value per input neurode
+        :return: list of output values
+        :raises ValueError: if features does not have one value per
+            input neurode
+        :raises InferenceServer.ClosedException: if the server closes
+            before the sample is run
+        """
+        if self._closing:
+            raise InferenceServer.ClosedException
+        features = np.asarray(features, dtype=float)
+        if features.shape != (self._network.num_inputs,):
+            raise ValueError
+        result = asyncio.get_running_loop().create_future()
+        await self._requests.put((features, result))
+        return await result
+
+    async def _next_batch(self):
+        """Wait for a request, then gather more until the batch is full
+        or the first request has waited max_delay seconds.
+
+        The batch is gathered in self._batch, so close can fail its
+        requests if it is cancelled part way.
+
+        :return: list of (features, future) pairs
+        """
+        loop = asyncio.get_running_loop()
+        batch = self._batch = []
+        batch.append(await self._requests.get())
+        deadline = loop.time() + self._max_delay
+        while len(batch) < self._max_batch_size:
+            if not self._requests.empty():
+                batch.append(self._requests.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._requests.get(),
+                                                    remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run_batches(self):
+        """Run each batch through the network and answer its requests.
+
+        The forward pass runs on a worker thread, so the event loop
+        keeps reading requests for the next batch meanwhile.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._next_batch()
+            features = np.stack([sample for sample, _ in batch])
+            try:
+                outputs = await loop.run_in_executor(
+                    None, self._network.predict, features)
+            except Exception as error:
+                for _, result in batch:
+                    if not result.done():
+                        result.set_exception(error)
+                continue
+            for (_, result), sample_outputs in zip(batch, outputs):
+                if not result.done():
+                    result.set_result(sample_outputs.tolist())
+            self._batch = []
+
+    async def _serve_connection(self, reader: asyncio.StreamReader,
+                                writer: asyncio.StreamWriter):
+        """Answer the requests of one connection until it closes.
+
+        Each request is answered as soon as its batch has run, so a
+        client can send many requests before reading the replies.
+        """
+        self._connections[asyncio.current_task()] = reader
+        replies = asyncio.Queue()
+        sender = asyncio.ensure_future(self._send_replies(replies, writer))
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ConnectionError, ValueError):
+                    break
+                if not line:
+                    break
+                await replies.put(asyncio.ensure_future(
+                    self._answer(line)))
+        finally:
+            await replies.put(None)
+            try:
+                await sender
+            except ConnectionError:
+                pass
+            writer.close()
+            del self._connections[asyncio.current_task()]
+
+    async def _answer(self, line: bytes):
+        """Return the reply to one request line."""
+        try:
+            features = json.loads(line)["features"]
+            outputs = await self.predict(features)
+        except (ValueError, KeyError, TypeError):
+            return {"error": "expected {\"features\": [...]} with one "
+                             "value per input neurode"}
+        except InferenceServer.ClosedException:
+            return {"error": "the server closed"}
+        return {"outputs": outputs}
+
+    @staticmethod
+    async def _send_replies(replies: asyncio.Queue,
+                            writer: asyncio.StreamWriter):
+        """Write the replies of a connection in the order of its
+        requests."""
+        while True:
+            answer = await replies.get()
+            if answer is None:
+                return
+            reply = await answer
+            writer.write(json.dumps(reply).encode() + b"\n")
+            await writer.drain()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve a network saved by FFBPNetwork.save.")
+    parser.add_argument("model", help="file written by FFBPNetwork.save")
+    parser.add_argument("--socket", help="Unix socket to listen on")
+    parser.add_argument("--port", type=int, default=8765,
+                        help="localhost TCP port, if no socket is given")
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-delay", type=float, default=0.005,
+                        help="seconds a request may wait for its batch")
+    args = parser.parse_args()
+
+    async def serve():
+        server = InferenceServer(FFBPNetwork.load(args.model),
+                                 args.max_batch_size, args.max_delay)
+        listener = await server.start(args.socket, port=args.port)
+        print(f"Serving on {listener.sockets[0].getsockname()}")
+        try:
+            await listener.serve_forever()
+        finally:
+            await server.close()
+
+    asyncio.run(serve())
+
+
+if __name__ == "__main__":
+    main()
@@ -6,55 +6,201 @@ Doubly Linked Lists, Inheritance, and dependency injection.
 """
 
 from __future__ import annotations
+from enum import Enum
 from DoublyLinkedList import DoublyLinkedList
 import Neurode
+import numpy as np
+from Activation import Sigmoid, get_activation
+
+
+class WeightInit(Enum):
+    """Identify how the weights of a new layer are drawn."""
+
+    UNIFORM = 'UNIFORM'
+    XAVIER = 'XAVIER'
+    HE = 'HE'
 
 
 class LayerList(DoublyLinkedList):
     """Implement the LayerList class."""
     def __init__(self, inputs: int, outputs: int,
-                 neurode_type: type(Neurode)):
+                 neurode_type: type(Neurode), activation=Sigmoid,
+                 weight_init=WeightInit.UNIFORM, seed=None):
         """Create a LayerList.
 
         :param inputs: indicates the number of input neurodes to create
         :param outputs: indicates the number of output neurodes
         to create
         :param neurode_type: indicates the type of neurode to create
+        :param activation: Activation subclass or name used by the
+        output layer and, unless told otherwise, by hidden layers
+        :param weight_init: how the weights of every layer are drawn
+        :param seed: seed for the generator the weights are drawn from,
+        or None for a fresh one
         """
         super().__init__()
-        self._input_neurodes = [neurode_type() for _ in range(inputs)]
-        self._output_neurodes = [neurode_type() for _ in range(outputs)]
         self._neurode_type = neurode_type
-        self.link_layers(self._input_neurodes, self._output_neurodes)
+        self._activation = get_activation(activation)
+        self._weight_init = weight_init
+        self._rng = np.random.default_rng(seed)
+        self._input_neurodes = self._create_layer(inputs)
+        self._output_neurodes = self._create_layer(outputs)
+        # one weight matrix for every layer after the input layer
+        self._layer_weights = [self.link_layers(self._input_neurodes,
+                                                self._output_neurodes)]
         self.add_to_head(self._input_neurodes)
         self.add_after_current(self._output_neurodes)
 
+    def _structure_changed(self):
+        """Forget the topology once a layer is added or removed."""
+        self._layers = None
+        self._layer_sizes = None
+
+    @classmethod
+    def from_weights(cls, weights: list, neurode_type: type(Neurode),
+                     activations: list, weight_init=WeightInit.UNIFORM,
+                     seed=None):
+        """Create a LayerList around existing weight matrices.
+
+        The matrices are used as they are, so no weight is drawn or
+        copied one edge at a time.
+
+        :param weights: one matrix per layer after the input layer, with
+        a row per neurode and a column per neurode of the layer before
+        :param neurode_type: indicates the type of neurode to create
+        :param activations: Activation subclass or name of every layer,
+        input layer first
+        :param weight_init: how the weights of layers added later are
+        drawn
+        :param seed: seed for the generator the weights of layers added
+        later are drawn from, or None for a fresh one
+        :raises ValueError: if the matrices and activations do not fit
+        together
+        """
+        if not weights or len(activations) != len(weights) + 1:
+            raise ValueError
+        layer_list = cls.__new__(cls)
+        DoublyLinkedList.__init__(layer_list)
+        layer_list._neurode_type = neurode_type
+        layer_list._activation = get_activation(activations[-1])
+        layer_list._weight_init = weight_init
+        layer_list._rng = np.random.default_rng(seed)
+        layers = [layer_list._create_layer(weights[0].shape[1],
+                                           activations[0])]
+        for layer_weights, activation in zip(weights, activations[1:]):
+            layers.append(layer_list._create_layer(layer_weights.shape[0],
+                                                   activation))
+        layer_list._input_neurodes = layers[0]
+        layer_list._output_neurodes = layers[-1]
+        layer_list._layer_weights = [
+            layer_list.link_layers(input_neurodes, output_neurodes,
+                                   layer_weights)
+            for input_neurodes, output_neurodes, layer_weights
+            in zip(layers, layers[1:], weights)]
+        layer_list.add_to_head(layers[0])
+        for layer in layers[1:]:
+            layer_list.add_after_current(layer)
+            layer_list.move_forward()
+        layer_list.reset_to_head()
+        return layer_list
+
+    def __setstate__(self, state):
+        """Restore a copied or unpickled LayerList.
+
+        Copying turns the rows the neurodes hold into arrays of their
+        own, so each neurode is pointed back at its row of the copied
+        weight matrix.
+
+        :param state: the attributes of the LayerList
+        """
+        self.__dict__.update(state)
+        for layer, weights in zip(self.layers[1:], self._layer_weights):
+            for row, neurode in enumerate(layer):
+                neurode._weights = weights[row]
+
+    def _draw_weights(self, num_rows: int, num_columns: int):
+        """Draw the weight matrix of a layer in one call.
+
+        UNIFORM draws from [0, 1). XAVIER draws from the Glorot uniform
+        range, which suits sigmoid and tanh layers, and HE draws from
+        the He normal distribution, which suits ReLU layers.
+
+        :param num_rows: number of neurodes in the layer
+        :param num_columns: number of neurodes in the layer before
+        :return: the weight matrix
+        """
+        if self._weight_init == WeightInit.XAVIER:
+            limit = np.sqrt(6 / (num_rows + num_columns))
+            return self._rng.uniform(-limit, limit, (num_rows, num_columns))
+        if self._weight_init == WeightInit.HE:
+            return self._rng.normal(0, np.sqrt(2 / max(num_columns, 1)),
+                                    (num_rows, num_columns))
+        return self._rng.random((num_rows, num_columns))
+
     # Helper method
-    def link_layers(self, input_neurodes, output_neurodes):
+    def link_layers(self, input_neurodes, output_neurodes, weights=None):
         """Link up the neurodes in neighboring layers.
 
+        The weights of output_neurodes are kept in one matrix, with a
+        row for each neurode and a column for each input neurode. A new
+        matrix is drawn all at once, and every neurode takes its row
+        without a call per edge.
+
         :param input_neurodes:  a list of neurodes or child classes
         :param output_neurodes: a list of neurodes or child classes
+        :param weights: optional matrix to use as the weights of
+        output_neurodes instead of drawing a new one
+        :return: the weight matrix of output_neurodes
+        :raises ValueError: if weights does not have the right shape
         """
+        # each side's Neighbors is built once and shared by the layer
+        downstream = Neurode.Neurode.Neighbors(output_neurodes)
         for neurode in input_neurodes:
-            neurode.reset_neighbors(output_neurodes,
+            neurode.reset_neighbors(downstream,
                                     Neurode.Neurode.Side.DOWNSTREAM)
 
-        for neurode in output_neurodes:
-            neurode.reset_neighbors(input_neurodes,
-                                    Neurode.Neurode.Side.UPSTREAM)
+        upstream = Neurode.Neurode.Neighbors(input_neurodes)
+        if weights is None:
+            weights = self._draw_weights(len(output_neurodes),
+                                         len(input_neurodes))
+        elif weights.shape != (len(output_neurodes), len(input_neurodes)):
+            raise ValueError
+        for row, neurode in enumerate(output_neurodes):
+            neurode.reset_neighbors(upstream,
+                                    Neurode.Neurode.Side.UPSTREAM,
+                                    weights[row])
+        return weights
+
+    def _create_layer(self, num_nodes: int, activation=None):
+        """Create a list of unlinked neurodes.
 
-    def add_layer(self, num_nodes: int):
+        :param num_nodes: number of neurodes to create
+        :param activation: Activation subclass or name, or None for
+        the activation of the LayerList
+        """
+        if activation is None:
+            activation = self._activation
+        activation = get_activation(activation)
+        layer = [self._neurode_type() for _ in range(num_nodes)]
+        for neurode in layer:
+            neurode.activation = activation
+        return layer
+
+    def add_layer(self, num_nodes: int, activation=None):
         """Add a hidden layer of neurodes after the current layer.
 
         :param num_nodes: number of nodes to create
+        :param activation: Activation subclass or name, or None for
+        the activation of the LayerList
         """
         if self.curr_data is self._output_neurodes:
             raise IndexError
         else:
-            hidden_nodes = [self._neurode_type() for _ in range(num_nodes)]
-            self.link_layers(self.curr_data, hidden_nodes)
-            self.link_layers(hidden_nodes, self._curr.next.data)
+            hidden_nodes = self._create_layer(num_nodes, activation)
+            position = self.curr_position
+            self._layer_weights[position:position + 1] = [
+                self.link_layers(self.curr_data, hidden_nodes),
+                self.link_layers(hidden_nodes, self._curr.next.data)]
             self.add_after_current(hidden_nodes)
 
     def remove_layer(self):
@@ -62,8 +208,111 @@ class LayerList(DoublyLinkedList):
         if self._curr.next.data is self._output_neurodes:
             raise IndexError
         else:
-            self.remove(self._curr.next.data)
-            self.link_layers(self.curr_data, self._curr.next.data)
+            position = self.curr_position
+            self.remove_after_current()
+            self._layer_weights[position:position + 2] = [
+                self.link_layers(self.curr_data, self._curr.next.data)]
+
+    def insert_layer(self, position: int, num_nodes: int, activation=None):
+        """Add a hidden layer of neurodes at a position.
+
+        :param position: position the new layer will have, between 1
+        (right after the input layer) and the position of the output
+        layer
+        :param num_nodes: number of nodes to create
+        :param activation: Activation subclass or name, or None for
+        the activation of the LayerList
+        :raises IndexError: if position is not between the input and
+        output layers
+        """
+        if not 0 < position < len(self):
+            raise IndexError
+        self.move_to(position - 1)
+        self.add_layer(num_nodes, activation)
+
+    def remove_layer_at(self, position: int):
+        """Remove the hidden layer at a position.
+
+        :param position: position of the hidden layer to remove
+        :raises IndexError: if there is no hidden layer at position
+        """
+        if not 0 < position < len(self) - 1:
+            raise IndexError
+        self.move_to(position - 1)
+        self.remove_layer()
+
+    def layer(self, position: int):
+        """Return the layer at a position, the input layer being 0.
+
+        :param position: position of the layer, negative from the
+        output layer
+        :raises IndexError: if there is no layer at position
+        """
+        return self[position]
+
+    @property
+    def layers(self):
+        """Return a tuple of every layer, input layer first.
+
+        The tuple is built once and kept until a layer is added or
+        removed, so the linked list is not walked on every call.
+        """
+        if self._layers is None:
+            self._layers = tuple(self)
+        return self._layers
+
+    @property
+    def layer_sizes(self):
+        """Return a tuple of the number of neurodes in each layer."""
+        if self._layer_sizes is None:
+            self._layer_sizes = tuple(len(layer) for layer in self.layers)
+        return self._layer_sizes
+
+    def forward(self, input_values):
+        """Calculate the value of every neurode, one layer at a time.
+
+        The layers are walked from input to output, so no neurode
+        waits for its upstream neighbors to check in and the call
+        stack does not grow with the number of layers. The values are
+        the same as those set_input produces.
+
+        :param input_values: one value per input neurode
+        :return: list of the output neurode values
+        """
+        for neurode, input_value in zip(self._input_neurodes, input_values):
+            neurode.set_input(input_value, propagate=False)
+        for layer in self.layers[1:]:
+            for neurode in layer:
+                neurode._calculate_value()
+        return [neurode.value for neurode in self._output_neurodes]
+
+    def backward(self, expected_values):
+        """Back-propagate expected values, one layer at a time.
+
+        The layers are walked from output to input. The deltas of a
+        layer are all calculated before it adjusts the weights of the
+        layer after it, which is the order the neurodes use when they
+        fire each other, so the weights end up the same.
+
+        :param expected_values: one value per output neurode
+        """
+        for neurode, expected_value in zip(self._output_neurodes,
+                                           expected_values):
+            neurode.set_expected(expected_value, propagate=False)
+        for layer in reversed(self.layers[:-1]):
+            for neurode in layer:
+                neurode._calculate_delta()
+            for neurode in layer:
+                neurode._update_weights()
+
+    @property
+    def weights(self):
+        """Return the weight matrix of every layer after the input layer.
+
+        The neurodes read their weights from rows of these matrices, so
+        a change to a matrix is a change to the network.
+        """
+        return list(self._layer_weights)
 
     @property
     def input_nodes(self):
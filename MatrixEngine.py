@@ -0,0 +1,161 @@
+"""This module contains the MatrixEngine class.
+
+The MatrixEngine works on the weight matrices a LayerList keeps for
+each layer, so a forward or backward pass is a handful of NumPy matrix
+products instead of one Python call per neurode per edge. The matrices
+are the ones the neurodes read their weights from, so the numbers match
+the FFBPNeurode message-passing path and a network can switch between
+the two without retraining or copying weights.
+"""
+
+from __future__ import annotations
+import numpy as np
+from LayerList import LayerList
+from Neurode import Neurode
+
+
+class MatrixEngine:
+    """Evaluate and train a LayerList with matrix arithmetic."""
+
+    def __init__(self, layers: LayerList):
+        """Create a MatrixEngine from a LayerList.
+
+        :param layers: the LayerList to compile
+        """
+        self._weights = []
+        self._learning_rates = []
+        self._activations = []
+        self._values = []
+        self.compile(layers)
+
+    def compile(self, layers: LayerList):
+        """Pick up the weight matrices, learning rates and activations.
+
+        Row j of the matrix for a layer holds the weights that neurode
+        j of that layer gives to each neurode of the layer before it.
+        The matrices are shared with layers, not copied, so the engine
+        must be compiled again after layers are added or removed.
+
+        :param layers: the LayerList to compile
+        """
+        self._settings_version = Neurode._settings_version
+        self._weights = layers.weights
+        self._learning_rates = []
+        self._activations = []
+        for layer in layers.layers[1:]:
+            self._learning_rates.append(np.array(
+                [[neurode.learning_rate] for neurode in layer],
+                dtype=float))
+            self._activations.append(layer[0].activation)
+        self._values = []
+
+    @property
+    def is_current(self):
+        """Return whether no learning rate or activation has changed
+        since the engine was compiled."""
+        return self._settings_version == Neurode._settings_version
+
+    @property
+    def weights(self):
+        """Return the list of weight matrices, input side first."""
+        return self._weights
+
+    @property
+    def layer_sizes(self):
+        """Return the number of neurodes in each layer."""
+        if not self._weights:
+            return []
+        return ([self._weights[0].shape[1]] +
+                [weights.shape[0] for weights in self._weights])
+
+    def forward(self, inputs):
+        """Run a forward pass and return the output layer values.
+
+        :param inputs: one sample as a 1-D array, or one sample per row
+            as a 2-D array
+        :return: array of output values with the same number of
+            dimensions as inputs
+        """
+        values = np.asarray(inputs, dtype=float)
+        self._values = [values]
+        for weights, activation in zip(self._weights, self._activations):
+            values = activation.values(values @ weights.T)
+            self._values.append(values)
+        return values
+
+    def predict(self, inputs, out=None):
+        """Run a forward pass without keeping anything for backward.
+
+        Each layer is calculated in place in one array per call, so the
+        cost does not grow with extra arrays per sample. The weights
+        are only read, so several threads may predict at once.
+
+        :param inputs: one sample per row as a 2-D array
+        :param out: optional array to receive the outputs; it must have
+            one row per sample and one column per output neurode
+        :return: 2-D array of output values, one row per sample
+        """
+        return MatrixEngine.forward_only(self._weights, self._activations,
+                                         inputs, out)
+
+    @staticmethod
+    def forward_only(all_weights, activations, inputs, out=None):
+        """Run inputs through weight matrices without keeping anything.
+
+        :param all_weights: weight matrix of every layer after the
+            input layer, input side first
+        :param activations: Activation subclass of every layer after
+            the input layer
+        :param inputs: one sample per row as a 2-D array
+        :param out: optional array to receive the outputs
+        :return: 2-D array of output values, one row per sample
+        """
+        values = np.asarray(inputs, dtype=float)
+        last_layer = len(all_weights) - 1
+        for layer_number, weights in enumerate(all_weights):
+            if layer_number == last_layer and out is not None:
+                values = np.matmul(values, weights.T, out=out)
+            else:
+                values = values @ weights.T
+            values = activations[layer_number].values(values, out=values)
+        return values
+
+    def backward(self, expected, optimizer=None):
+        """Back-propagate expected values and update the weights.
+
+        Every delta is calculated from the weights of the last forward
+        pass before any weight is changed, as in the neurode path. When
+        the last forward pass had several rows, the weight adjustments
+        of all rows are added together and applied once.
+
+        :param expected: expected output values, shaped like the
+            result of the last forward pass
+        :param optimizer: Optimizer that applies the adjustments, or
+            None for the plain gradient descent of the neurodes
+        :raises IndexError: if there was no forward pass to go back
+            through
+        """
+        if not self._values:
+            raise IndexError
+        outputs = self._values[-1]
+        delta = ((np.asarray(expected, dtype=float) - outputs) *
+                 self._activations[-1].derivatives(outputs))
+        for layer_number in range(len(self._weights) - 1, -1, -1):
+            weights = self._weights[layer_number]
+            upstream_values = self._values[layer_number]
+            upstream_delta = None
+            if layer_number > 0:
+                upstream_delta = (
+                    (delta @ weights) *
+                    self._activations[layer_number - 1].derivatives(
+                        upstream_values))
+            if delta.ndim == 1:
+                adjustment = np.outer(delta, upstream_values)
+            else:
+                adjustment = delta.T @ upstream_values
+            if optimizer is None:
+                weights += self._learning_rates[layer_number] * adjustment
+            else:
+                optimizer.update(layer_number, weights, adjustment,
+                                 self._learning_rates[layer_number])
+            delta = upstream_delta
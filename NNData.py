@@ -1,15 +1,17 @@
 """This module contains the NNData Class.
 
-This module demonstrates an understanding of NumPy Arrays, Deque,
-Random, and Specification. The NNData Class contains methods that help
-manage testing and training data. Additionally, this module contains
-the enums Order and Set.
+This module demonstrates an understanding of NumPy Arrays, Random,
+and Specification. The NNData Class contains methods that help manage
+testing and training data. Additionally, this module contains the enums
+Order and Set.
 """
+import csv
+import itertools
+import json
 import math
+import os
 from enum import Enum
-from collections import deque
 import numpy as np
-import random
 
 
 class Order(Enum):
@@ -27,7 +29,12 @@ class Set(Enum):
 
 
 class NNData:
-    """Implementing the NNData Class."""
+    """Implementing the NNData Class.
+
+    The train and test indices are NumPy integer arrays. Priming a pool
+    shuffles it in place with a seeded numpy.random.Generator, and items
+    are taken from the pool by moving a cursor along it.
+    """
 
     @staticmethod
     def percentage_limiter(percentage: float):
@@ -46,12 +53,15 @@ class NNData:
         else:
             return percentage
 
-    def __init__(self, features=None, labels=None, train_factor=0.9):
+    def __init__(self, features=None, labels=None, train_factor=0.9,
+                 seed=None):
         """Create an NNData object.
 
         :param features: features of one example from data
         :param labels: list of list where one row is one label from data
         :param train_factor: percent of data to be used for training
+        :param seed: seed for the generator that splits and shuffles the
+            data, or None for a fresh one
         """
         if features is None:
             features = []
@@ -61,15 +71,21 @@ class NNData:
         self._features = None
         self._labels = None
         self._train_factor = NNData.percentage_limiter(train_factor)
-        self._train_indices = []
-        self._test_indices = []
-        self._train_pool = deque()
-        self._test_pool = deque()
+        self._rng = np.random.default_rng(seed)
+        self._train_indices = np.empty(0, dtype=np.intp)
+        self._test_indices = np.empty(0, dtype=np.intp)
+        self._train_pool = self._train_indices
+        self._test_pool = self._test_indices
+        self._train_cursor = 0
+        self._test_cursor = 0
         self.load_data(features, labels)
 
     def load_data(self, features=None, labels=None):
         """Assign self._features and self._labels to respective array.
 
+        Features and labels that are already float arrays are used as
+        they are rather than copied.
+
         :param features: features from one example of data
         :param labels: list of list where one row is one label from data
         """
@@ -86,60 +102,304 @@ class NNData:
             raise ValueError
 
         try:
-            self._features = np.array(features, dtype=float)
-            self._labels = np.array(labels, dtype=float)
+            self._features = np.asarray(features, dtype=float)
+            self._labels = np.asarray(labels, dtype=float)
+        except ValueError:
+            self._features = None
+            self._labels = None
+            self.split_set()
+            raise ValueError
+
+        self.split_set()
+
+    @staticmethod
+    def _map_file(path, dtype, num_columns):
+        """Memory-map a 2-D array stored in a file, read-only.
+
+        :param path: a .npy file, or a raw binary file of rows
+        :param dtype: type of the values in a raw binary file
+        :param num_columns: number of values per row in a raw binary
+            file
+        :return: np.ndarray backed by the file
+        :raises ValueError: if a raw binary file has no num_columns or
+            does not hold whole rows
+        """
+        if str(path).endswith(".npy"):
+            data = np.load(path, mmap_mode="r")
+        else:
+            if num_columns is None:
+                raise ValueError
+            data = np.memmap(path, dtype=dtype, mode="r")
+            if len(data) % num_columns != 0:
+                raise ValueError
+            data = data.reshape(-1, num_columns)
+        if data.ndim == 1:
+            data = data.reshape(-1, 1)
+        return data
+
+    def load_files(self, features_path, labels_path, dtype=float,
+                   num_features=None, num_labels=None):
+        """Memory-map the features and labels instead of reading them.
+
+        Only the rows that are asked for are read from disk, so the
+        data can be larger than memory. The values keep the type they
+        have in the files.
+
+        :param features_path: a .npy file, or a raw binary file with
+            num_features values of type dtype per row
+        :param labels_path: a .npy file, or a raw binary file with
+            num_labels values of type dtype per row
+        :param dtype: type of the values in raw binary files
+        :param num_features: number of features per row of a raw file
+        :param num_labels: number of labels per row of a raw file
+        :raises ValueError: if the files cannot be mapped or do not
+            have the same number of rows
+        """
+        try:
+            features = NNData._map_file(features_path, dtype, num_features)
+            labels = NNData._map_file(labels_path, dtype, num_labels)
         except ValueError:
             self._features = None
             self._labels = None
             self.split_set()
             raise ValueError
 
+        if len(features) != len(labels):
+            self._features = None
+            self._labels = None
+            self.split_set()
+            raise ValueError
+
+        self._features = features
+        self._labels = labels
         self.split_set()
 
+    @staticmethod
+    def read_csv_chunks(path, label_columns, chunk_size=10000, delimiter=",",
+                        has_header=False, dtype=float):
+        """Parse a CSV file a chunk of rows at a time.
+
+        Only one chunk is held in memory at a time, so files far larger
+        than memory can be read.
+
+        :param path: the CSV file
+        :param label_columns: indices of the columns holding labels; the
+            other columns hold features
+        :param chunk_size: number of rows parsed at once
+        :param delimiter: character between the columns
+        :param has_header: whether to skip the first row
+        :param dtype: type of the parsed values
+        :return: generator of (features, labels) tuples of 2-D arrays
+        :raises ValueError: if a value cannot be parsed
+        """
+        with open(path, newline="") as csv_file:
+            reader = csv.reader(csv_file, delimiter=delimiter)
+            if has_header:
+                next(reader, None)
+            feature_columns = None
+            while True:
+                rows = list(itertools.islice(reader, chunk_size))
+                if not rows:
+                    return
+                chunk = np.array([row for row in rows if row], dtype=dtype)
+                if len(chunk) == 0:
+                    continue
+                if feature_columns is None:
+                    feature_columns = [
+                        column for column in range(chunk.shape[1])
+                        if column not in label_columns
+                        and column - chunk.shape[1] not in label_columns]
+                yield chunk[:, feature_columns], chunk[:, label_columns]
+
+    def load_csv(self, path, label_columns, cache_dir=None,
+                 chunk_size=10000, delimiter=",", has_header=False,
+                 dtype=float):
+        """Load a CSV file, parsing it only once.
+
+        The file is parsed chunk_size rows at a time. With a cache_dir,
+        each chunk is appended to raw binary feature and label files
+        there, which are then memory-mapped as in load_files. The split
+        is stored with them, so later loads of the same file skip the
+        parsing and keep the same train and test sets. The cache records
+        the absolute path, size and modification time of the CSV file
+        and the options it was parsed with, and is remade when any of
+        them differ.
+
+        :param path: the CSV file
+        :param label_columns: indices of the columns holding labels; the
+            other columns hold features
+        :param cache_dir: directory for the binary cache, or None to
+            load the data into memory without caching it
+        :param chunk_size: number of rows parsed at once
+        :param delimiter: character between the columns
+        :param has_header: whether to skip the first row
+        :param dtype: type of the parsed values
+        :raises ValueError: if the file has no rows or a value cannot be
+            parsed
+        """
+        label_columns = list(label_columns)
+        chunks = NNData.read_csv_chunks(path, label_columns, chunk_size,
+                                        delimiter, has_header, dtype)
+        if cache_dir is None:
+            feature_chunks = []
+            label_chunks = []
+            for features, labels in chunks:
+                feature_chunks.append(features)
+                label_chunks.append(labels)
+            if not feature_chunks:
+                raise ValueError
+            self.load_data(np.concatenate(feature_chunks),
+                           np.concatenate(label_chunks))
+            return
+
+        features_path = os.path.join(cache_dir, "features.bin")
+        labels_path = os.path.join(cache_dir, "labels.bin")
+        split_path = os.path.join(cache_dir, "dataset.npz")
+        source = NNData._csv_source(path, label_columns, delimiter,
+                                    has_header, dtype)
+        cache_is_current = False
+        if os.path.exists(split_path):
+            with np.load(split_path) as cache:
+                cache_is_current = all(
+                    name in cache and np.array_equal(cache[name], value)
+                    for name, value in source.items())
+
+        if cache_is_current:
+            with np.load(split_path) as cache:
+                self.load_files(features_path, labels_path,
+                                np.dtype(str(cache["dtype"])),
+                                int(cache["num_features"]),
+                                int(cache["num_labels"]))
+                if float(cache["train_factor"]) == self._train_factor:
+                    self._train_indices = cache["train_indices"]
+                    self._test_indices = cache["test_indices"]
+                    self._train_pool = self._train_indices[:0]
+                    self._test_pool = self._test_indices[:0]
+                    return
+            self._save_split(split_path, source)
+            return
+
+        os.makedirs(cache_dir, exist_ok=True)
+        if os.path.exists(split_path):
+            os.remove(split_path)
+        num_features = num_labels = None
+        with open(features_path, "wb") as features_file, \
+                open(labels_path, "wb") as labels_file:
+            for features, labels in chunks:
+                features.tofile(features_file)
+                labels.tofile(labels_file)
+                num_features = features.shape[1]
+                num_labels = labels.shape[1]
+        if num_features is None:
+            raise ValueError
+        self.load_files(features_path, labels_path, dtype, num_features,
+                        num_labels)
+        self._save_split(split_path, source)
+
+    @staticmethod
+    def _csv_source(path, label_columns, delimiter, has_header, dtype):
+        """Describe a CSV file and how it is parsed, to tell whether a
+        cache was made from it.
+
+        :return: dictionary of names to arrays
+        """
+        status = os.stat(path)
+        return {"source_path": np.array(os.path.abspath(path)),
+                "source_size": np.array(status.st_size),
+                "source_mtime_ns": np.array(status.st_mtime_ns),
+                "label_columns": np.array(label_columns, dtype=np.intp),
+                "delimiter": np.array(delimiter),
+                "has_header": np.array(bool(has_header)),
+                "parse_dtype": np.array(np.dtype(dtype).str)}
+
+    def _save_split(self, split_path, source):
+        """Write the split and the shape of the data next to the data.
+
+        The file is written under another name and then renamed, so a
+        half-written cache is never taken for a whole one.
+
+        :param split_path: .npz file to write
+        :param source: description of the CSV file from _csv_source
+        """
+        temp_path = split_path + ".tmp"
+        with open(temp_path, "wb") as split_file:
+            np.savez(split_file,
+                     train_indices=self._train_indices,
+                     test_indices=self._test_indices,
+                     train_factor=self._train_factor,
+                     num_features=self._features.shape[1],
+                     num_labels=self._labels.shape[1],
+                     dtype=self._features.dtype.str,
+                     **source)
+        os.replace(temp_path, split_path)
+
     def split_set(self, new_train_factor=None):
         """Create train_indices and test_indices.
 
+        The samples are split at random. Each set keeps its indices in
+        ascending order, so a static pool visits the samples in the
+        order they were loaded.
+
         :param new_train_factor: new percentage for training, float
         between 0 and 1.
         """
+        if new_train_factor is not None:
+            self._train_factor = NNData.percentage_limiter(new_train_factor)
+
         if self._features is None:
             # note to self: if there are no features, there can't be any
             # training indices nor test indices
-            self._train_indices = []
-            self._test_indices = []
-            return
+            indices = np.empty(0, dtype=np.intp)
+            number_of_indices = 0
+        else:
+            size_of_features = len(self._features)
+            number_of_indices = math.floor(size_of_features *
+                                           self._train_factor)
+            indices = self._rng.permutation(size_of_features).astype(
+                np.intp, copy=False)
+
+        self._train_indices = np.sort(indices[:number_of_indices])
+        self._test_indices = np.sort(indices[number_of_indices:])
+        self._train_pool = self._train_indices[:0]
+        self._test_pool = self._test_indices[:0]
+        self._train_cursor = 0
+        self._test_cursor = 0
+        return
 
-        if new_train_factor is not None:
-            self._train_factor = NNData.percentage_limiter(new_train_factor)
+    def _primed_pool(self, indices, pool, order):
+        """Return a pool holding every one of indices.
 
-        size_of_features = len(self._features)
-        number_of_indices = math.floor(size_of_features *
-                                       self._train_factor)
-        indices = [i for i in range(size_of_features)]
-        random.shuffle(indices)
+        A shuffled pool reuses the array of the last shuffled pool when
+        it can, since shuffling any ordering of the indices is as good
+        as shuffling the indices themselves.
 
-        self._train_indices = indices[:number_of_indices]
-        self._test_indices = indices[number_of_indices:]
-        return
+        :param indices: the train or test indices
+        :param pool: the pool being replaced
+        :param order: used to either shuffle the pool or keep in order
+        :return: np.ndarray
+        """
+        if order != Order.SHUFFLE:
+            return indices
+        if pool is indices or len(pool) != len(indices):
+            pool = indices.copy()
+        self._rng.shuffle(pool)
+        return pool
 
     def prime_data(self, target_set=None, order=None):
         """Load _train_pool or _test_pool, or both.
 
         :param target_set: used to determine which pool to load
-        :param order: used to either shuffle deque or keep in order
+        :param order: used to either shuffle the pool or keep in order
         """
         if target_set is None or target_set == Set.TRAIN:
-            # self._train_pool.clear()
-            self._train_pool = deque(self._train_indices)
-            if order == Order.SHUFFLE:
-                random.shuffle(self._train_pool)
+            self._train_pool = self._primed_pool(self._train_indices,
+                                                 self._train_pool, order)
+            self._train_cursor = 0
 
         if target_set is None or target_set == Set.TEST:
-            # self._test_pool.clear()
-            self._test_pool = deque(self._test_indices)
-
-            if order == Order.SHUFFLE:
-                random.shuffle(self._test_pool)
+            self._test_pool = self._primed_pool(self._test_indices,
+                                                self._test_pool, order)
+            self._test_cursor = 0
 
     def get_one_item(self, target_set=None):
         """Return one feature/label pair as a tuple.
@@ -148,19 +408,142 @@ class NNData:
         :return: tuple
         """
         if target_set is None or target_set == Set.TRAIN:
-            if len(self._train_pool) == 0:
+            if self._train_cursor >= len(self._train_pool):
                 return None
             else:
-                index = self._train_pool.popleft()
+                index = self._train_pool[self._train_cursor]
+                self._train_cursor += 1
                 return (self._features[index], self._labels[index])
 
         elif target_set == Set.TEST:
-            if len(self._test_pool) == 0:
+            if self._test_cursor >= len(self._test_pool):
                 return None
             else:
-                index = self._test_pool.popleft()
+                index = self._test_pool[self._test_cursor]
+                self._test_cursor += 1
                 return (self._features[index], self._labels[index])
 
+    def get_batch(self, target_set=None, batch_size=1):
+        """Return up to batch_size feature/label pairs as two arrays.
+
+        Row i of the features array belongs with row i of the labels
+        array. Fewer rows are returned when the pool runs out.
+
+        :param target_set: determines which pool used to find pairs
+        :param batch_size: largest number of pairs to return
+        :return: tuple of two 2-D arrays, or None if the pool is empty
+        """
+        if target_set is None or target_set == Set.TRAIN:
+            pool = self._train_pool
+            cursor = self._train_cursor
+            self._train_cursor = min(cursor + batch_size, len(pool))
+        else:
+            pool = self._test_pool
+            cursor = self._test_cursor
+            self._test_cursor = min(cursor + batch_size, len(pool))
+        if cursor >= len(pool):
+            return None
+        indices = pool[cursor:cursor + batch_size]
+        return (self._features[indices], self._labels[indices])
+
+    def iter_batches(self, target_set=None, batch_size=1, order=None,
+                     num_buffers=None):
+        """Prime a pool and yield its feature/label pairs in batches.
+
+        With a static order, a batch of neighboring samples is a slice
+        view of the data and nothing is copied. Other batches are
+        gathered into two buffers made once per call, so the arrays
+        yielded are overwritten by the next batch and must be used or
+        copied before asking for it.
+
+        With num_buffers, every batch is gathered, in turn, into one of
+        num_buffers pairs of buffers made once per call, so a batch
+        stays valid until num_buffers more batches have been yielded.
+
+        :param target_set: determines which pool used to find pairs
+        :param batch_size: largest number of pairs in a batch
+        :param order: used to either shuffle the pool or keep in order
+        :param num_buffers: number of buffer pairs to gather every batch
+            into in turn, or None for the behavior above
+        :return: generator of tuples of two 2-D arrays
+        :raises ValueError: if batch_size or num_buffers is less than 1
+        """
+        if batch_size < 1 or (num_buffers is not None and num_buffers < 1):
+            raise ValueError
+        if target_set is None:
+            target_set = Set.TRAIN
+        self.prime_data(target_set, order)
+        if target_set == Set.TRAIN:
+            pool = self._train_pool
+        else:
+            pool = self._test_pool
+
+        buffers = None
+        slot = 0
+        for start in range(0, len(pool), batch_size):
+            indices = pool[start:start + batch_size]
+            count = len(indices)
+            if target_set == Set.TRAIN:
+                self._train_cursor = start + count
+            else:
+                self._test_cursor = start + count
+
+            # a static pool is sorted, so a batch whose ends are count - 1
+            # apart holds neighboring samples
+            if (num_buffers is None and order != Order.SHUFFLE and
+                    indices[-1] - indices[0] == count - 1):
+                yield (self._features[indices[0]:indices[-1] + 1],
+                       self._labels[indices[0]:indices[-1] + 1])
+                continue
+
+            if buffers is None:
+                rows = min(batch_size, len(pool))
+                buffers = [
+                    (np.empty((rows,) + self._features.shape[1:],
+                              dtype=self._features.dtype),
+                     np.empty((rows,) + self._labels.shape[1:],
+                              dtype=self._labels.dtype))
+                    for _ in range(num_buffers or 1)]
+            feature_buffer, label_buffer = buffers[slot]
+            slot = (slot + 1) % len(buffers)
+            np.take(self._features, indices, axis=0,
+                    out=feature_buffer[:count])
+            np.take(self._labels, indices, axis=0, out=label_buffer[:count])
+            yield feature_buffer[:count], label_buffer[:count]
+
+    def get_state(self):
+        """Return what is needed to carry on shuffling where we are.
+
+        :return: dictionary of the split, the train pool and the
+            generator state, JSON encoded, as arrays
+        """
+        return {"train_indices": self._train_indices.copy(),
+                "test_indices": self._test_indices.copy(),
+                "train_pool": np.array(self._train_pool),
+                "rng_state": np.array(json.dumps(
+                    self._rng.bit_generator.state))}
+
+    def set_state(self, state):
+        """Restore the state returned by get_state.
+
+        The train pool is left empty, ready to be primed.
+
+        :param state: dictionary-like holding the arrays of get_state
+        :raises ValueError: if state does not fit the data
+        """
+        train_indices = np.asarray(state["train_indices"], dtype=np.intp)
+        test_indices = np.asarray(state["test_indices"], dtype=np.intp)
+        if self._features is None or \
+                len(train_indices) + len(test_indices) != len(self._features):
+            raise ValueError
+        self._train_indices = train_indices
+        self._test_indices = test_indices
+        self._train_pool = np.array(state["train_pool"], dtype=np.intp)
+        self._test_pool = self._test_indices[:0]
+        self._train_cursor = len(self._train_pool)
+        self._test_cursor = 0
+        self._rng.bit_generator.state = json.loads(str(state["rng_state"]))
+
     def number_of_samples(self, target_set=None):
         """Determine the number testing or training samples.
 
@@ -181,13 +564,13 @@ class NNData:
         :return: bool
         """
         if target_set == Set.TEST:
-            if len(self._test_pool) == 0:
+            if self._test_cursor >= len(self._test_pool):
                 return True
             else:
                 return False
 
         if target_set is None or target_set == Set.TRAIN:
-            if len(self._train_pool) == 0:
+            if self._train_cursor >= len(self._train_pool):
                 return True
             else:
                 return False
@@ -10,33 +10,60 @@ from __future__ import annotations
 from enum import Enum
 from abc import ABC, abstractmethod
 import random
-import copy
-import math
+import numpy as np
+from Activation import Sigmoid, get_activation
 
 
 class MultiLinkNode(ABC):
+    """Link a node to its upstream and downstream neighbors.
+
+    The neighbors of each side are kept in their own fields rather
+    than in dictionaries keyed by Side, and __slots__ keeps each node
+    free of a __dict__.
+    """
+
+    __slots__ = ('_upstream_neighbors', '_downstream_neighbors',
+                 '_upstream_reports', '_downstream_reports',
+                 '_upstream_count', '_downstream_count',
+                 '_upstream_round', '_downstream_round')
+
     class Side(Enum):
         """Identify the relationships between nodes."""
         UPSTREAM = "UPSTREAM"
         DOWNSTREAM = "DOWNSTREAM"
 
+    class Neighbors(tuple):
+        """An immutable list of neighboring nodes.
+
+        One Neighbors can be shared by every node linked to the same
+        layer, so the list and the index of each node's position in it
+        are only stored once for the whole layer.
+        """
+
+        def __new__(cls, nodes=()):
+            neighbors = super().__new__(cls, nodes)
+            neighbors.positions = {node: position for position, node
+                                   in enumerate(neighbors)}
+            return neighbors
+
     def __init__(self):
         """Implement Multilinknode class."""
-        self._reporting_nodes = {self.Side.UPSTREAM: 0,
-                                 self.Side.DOWNSTREAM: 0}
-        self._reference_value = {self.Side.UPSTREAM: 0,
-                                 self.Side.DOWNSTREAM: 0}
-        self._neighbors = {self.Side.UPSTREAM: [],
-                           self.Side.DOWNSTREAM: []}
+        self._upstream_neighbors = MultiLinkNode.Neighbors()
+        self._downstream_neighbors = MultiLinkNode.Neighbors()
+        self._upstream_reports = bytearray()
+        self._downstream_reports = bytearray()
+        self._upstream_count = 0
+        self._downstream_count = 0
+        self._upstream_round = 1
+        self._downstream_round = 1
 
     def __str__(self):
         upstream_ids = ""
         downstream_ids = ""
-        for upstream_neighbors in self._neighbors[MultiLinkNode.Side.UPSTREAM]:
+        for upstream_neighbors in self._upstream_neighbors:
             upstream_ids += f"{id(upstream_neighbors)}, "
 
-        for downstream_neighbors in (
-                self._neighbors)[MultiLinkNode.Side.DOWNSTREAM]:
+        for downstream_neighbors in self._downstream_neighbors:
             downstream_ids += f"{id(downstream_neighbors)}, "
 
         string = (f"Node ID: {id(self)} "
@@ -55,25 +82,53 @@ class MultiLinkNode(ABC):
         pass
 
     def reset_neighbors(self, nodes: list, side: MultiLinkNode.Side):
-        """Take in a list and side, store references to linked nodes"""
+        """Take in a list and side, store references to linked nodes.
 
-        self._neighbors[side] = []
-        copy_of_nodes = copy.copy(nodes)
+        A Neighbors passed in as nodes is shared rather than copied.
+        The position of every node is indexed so a node can check in
+        without searching the list.
+        """
+        nodes = self._link_neighbors(nodes, side)
+        for node in nodes:
+            self._process_new_neighbor(node, side)
+
+    def _link_neighbors(self, nodes: list, side: MultiLinkNode.Side):
+        """Store the nodes on one side and clear its check-in state.
+
+        :param nodes: list of nodes, or a Neighbors to share
+        :param side: Side enum
+        :return: the Neighbors stored
+        """
+        if not isinstance(nodes, MultiLinkNode.Neighbors):
+            nodes = MultiLinkNode.Neighbors(nodes)
 
         if side is MultiLinkNode.Side.UPSTREAM:
-            self._neighbors[MultiLinkNode.Side.UPSTREAM] = copy_of_nodes
+            self._upstream_neighbors = nodes
+            self._upstream_reports = bytearray(len(nodes))
+            self._upstream_count = 0
+            self._upstream_round = 1
         elif side is MultiLinkNode.Side.DOWNSTREAM:
-            self._neighbors[MultiLinkNode.Side.DOWNSTREAM] = copy_of_nodes
-        for node in nodes:
-            self._process_new_neighbor(node, side)
-        number_of_nodes = len(nodes)
-        self._reference_value[side] = (math.pow(2, number_of_nodes) - 1)
+            self._downstream_neighbors = nodes
+            self._downstream_reports = bytearray(len(nodes))
+            self._downstream_count = 0
+            self._downstream_round = 1
+        return nodes
 
 
 class Neurode(MultiLinkNode):
-    """Inherit and implement MultiLinkNode."""
+    """Inherit and implement MultiLinkNode.
+
+    The weights given to the upstream neighbors are kept in a NumPy
+    array in the same order as the neighbors. In a LayerList this array
+    is a row of the layer's weight matrix.
+    """
 
-    _learning_rate = .05
+    __slots__ = ('_value', '_weights', '_learning_rate', '_activation')
+
+    _default_learning_rate = .05
+    # counts changes of any neurode's learning rate or activation, so a
+    # MatrixEngine can tell that what it compiled is out of date
+    _settings_version = 0
 
     @property
     def learning_rate(self):
@@ -89,6 +144,7 @@ class Neurode(MultiLinkNode):
         try:
             if new_learning_rate >= 0 and new_learning_rate <= 1:
                 self._learning_rate = new_learning_rate
+                Neurode._settings_version += 1
             else:
                 print("Please enter a number between 0 and 1")
         except ValueError:
@@ -97,9 +153,26 @@ class Neurode(MultiLinkNode):
     def __init__(self):
         """Implement the Neurode class."""
         self._value = 0
-        self._weights = {}
+        self._weights = np.zeros(0)
+        self._learning_rate = Neurode._default_learning_rate
+        self._activation = Sigmoid
         super().__init__()
 
+    @property
+    def activation(self):
+        """Return the Activation subclass of this neurode."""
+        return self._activation
+
+    @activation.setter
+    def activation(self, new_activation):
+        """Set the activation function.
+
+        :param new_activation: an Activation subclass or its name
+        :raises ValueError: if new_activation is not an activation
+        """
+        self._activation = get_activation(new_activation)
+        Neurode._settings_version += 1
+
     @property
     def value(self):
         """Return value."""
@@ -110,46 +183,74 @@ class Neurode(MultiLinkNode):
 
         :param node: Neurode
         """
-        return self._weights[node]
+        return float(self._weights[self._upstream_neighbors.positions[node]])
+
+    def reset_neighbors(self, nodes: list, side: MultiLinkNode.Side,
+                        weights: np.ndarray = None):
+        """Link the nodes on one side, giving upstream nodes a weight.
+
+        Each upstream node gets a random weight from
+        _process_new_neighbor unless weights is given, in which case
+        weights becomes the storage of this neurode's weights as it is.
+        A neurode has nothing to set up for a downstream node, so those
+        are linked without a call per node.
+
+        :param nodes: list of Neurodes
+        :param side: Side enum
+        :param weights: optional float array with one weight per node,
+            such as a row of a layer's weight matrix
+        :raises ValueError: if weights does not have one weight per node
+        """
+        if side is MultiLinkNode.Side.DOWNSTREAM:
+            self._link_neighbors(nodes, side)
+        elif weights is not None:
+            if len(weights) != len(nodes):
+                raise ValueError
+            self._link_neighbors(nodes, side)
+            self._weights = weights
+        else:
+            self._weights = np.zeros(len(nodes))
+            super().reset_neighbors(nodes, side)
 
     def _process_new_neighbor(self, node: Neurode, side: MultiLinkNode.Side):
-        """Add node as a key to weights and generate a random weight.
+        """Generate a random weight for an upstream node.
 
         :param node: Neurode
         :param side: Side enum
         """
         if side is MultiLinkNode.Side.UPSTREAM:
-            self._weights[node] = random.random()
+            self._weights[self._upstream_neighbors.positions[node]] = \
+                random.random()
 
     def _check_in(self, node: Neurode, side: MultiLinkNode.Side):
         """Determine if all nodes have reported.
 
-        Return true if all nodes have reported, false if not.
+        Return true if all nodes have reported, false if not. Each
+        neighbor's slot holds the parity of the round it last reported
+        in, so a node that reports twice in a round is only counted
+        once and starting a new round does not clear every slot.
         :param node: Neurode
         :param side: Side enum
         :return: boolean
         """
-        # Below is the corrected version
-        index_of_node = self._neighbors[side].index(node)
-        self._reporting_nodes[side] =\
-            self._reporting_nodes[side] | 1 << index_of_node
-        if self._reporting_nodes[side] == self._reference_value[side]:
-            self._reporting_nodes[side] = 0
-            return True
+        if side is MultiLinkNode.Side.UPSTREAM:
+            index_of_node = self._upstream_neighbors.positions[node]
+            if self._upstream_reports[index_of_node] != self._upstream_round:
+                self._upstream_reports[index_of_node] = self._upstream_round
+                self._upstream_count += 1
+            if self._upstream_count == len(self._upstream_neighbors):
+                self._upstream_count = 0
+                self._upstream_round ^= 1
+                return True
         else:
-            return False
-
-        # Below is the OG version
-        # index_of_node = self._neighbors[side].index(node)
-        # if side is MultiLinkNode.Side.UPSTREAM:
-        #     self._reporting_nodes[MultiLinkNode.Side.UPSTREAM] \
-        #         = math.pow(2, index_of_node + 1) - 1
-        # elif side is MultiLinkNode.Side.DOWNSTREAM:
-        #     self._reporting_nodes[MultiLinkNode.Side.DOWNSTREAM] \
-        #         = math.pow(2, index_of_node + 1) - 1
-
-        # if self._reporting_nodes[side] == self._reference_value[side]:
-        #     self._reporting_nodes[side] = 0
-        #     return True
-        # else:
-        #     return False
+            index_of_node = self._downstream_neighbors.positions[node]
+            if (self._downstream_reports[index_of_node] !=
+                    self._downstream_round):
+                self._downstream_reports[index_of_node] = \
+                    self._downstream_round
+                self._downstream_count += 1
+            if self._downstream_count == len(self._downstream_neighbors):
+                self._downstream_count = 0
+                self._downstream_round ^= 1
+                return True
+        return False
@@ -0,0 +1,193 @@
+"""This module contains the optimizers that update the weights.
+
+An optimizer turns the adjustment back-propagation works out for a
+layer into a change of that layer's weight matrix. Anything it needs to
+remember about a weight, such as a running average of its adjustments,
+is kept in arrays shaped like the weight matrices, one set per layer,
+so the state costs a few matrix operations per layer and no per-neurode
+bookkeeping.
+"""
+
+from abc import ABC, abstractmethod
+import numpy as np
+
+
+class Optimizer(ABC):
+    """Update rule for the weight matrices of a network."""
+
+    name = None
+    num_state_arrays = 0
+
+    def __init__(self):
+        """Create an Optimizer with no state."""
+        self.scale = 1.0
+        self._state = []
+        self._steps = []
+
+    def reset(self):
+        """Forget the state of every layer."""
+        self._state = []
+        self._steps = []
+
+    def _layer_state(self, layer_number: int, weights: np.ndarray):
+        """Return the state arrays of a layer, making them if needed.
+
+        The arrays are made again if the layer has changed shape.
+
+        :param layer_number: position of the layer's weight matrix
+        :param weights: the layer's weight matrix
+        :return: list of num_state_arrays arrays shaped like weights
+        """
+        while len(self._state) <= layer_number:
+            self._state.append(None)
+            self._steps.append(0)
+        state = self._state[layer_number]
+        if state is None or state[0].shape != weights.shape:
+            state = [np.zeros_like(weights)
+                     for _ in range(self.num_state_arrays)]
+            self._state[layer_number] = state
+            self._steps[layer_number] = 0
+        return state
+
+    def _count_step(self, layer_number: int):
+        """Count an update of a layer whose state has been made.
+
+        :param layer_number: position of the layer's weight matrix
+        :return: number of updates of the layer, this one included
+        """
+        self._steps[layer_number] += 1
+        return self._steps[layer_number]
+
+    @abstractmethod
+    def update(self, layer_number: int, weights: np.ndarray,
+               adjustment: np.ndarray, learning_rates: np.ndarray):
+        """Change one layer's weights in place.
+
+        :param layer_number: position of the layer's weight matrix
+        :param weights: the layer's weight matrix
+        :param adjustment: what plain gradient descent would add to the
+            weights before the learning rate is applied
+        :param learning_rates: learning rate of each neurode of the
+            layer, as a column
+        """
+        pass
+
+    def get_state(self):
+        """Return the state arrays, to be saved with a checkpoint.
+
+        :return: dictionary of names to arrays
+        """
+        arrays = {"optimizer": np.array(self.name),
+                  "optimizer_scale": np.array(self.scale),
+                  "optimizer_steps": np.array(self._steps, dtype=np.int64)}
+        for layer_number, state in enumerate(self._state):
+            if state is None:
+                continue
+            for array_number, array in enumerate(state):
+                arrays[f"optimizer_{layer_number}_{array_number}"] = \
+                    array.copy()
+        return arrays
+
+    def set_state(self, state):
+        """Restore the state returned by get_state.
+
+        :param state: dictionary-like holding the arrays of get_state
+        :raises ValueError: if state was saved by another optimizer
+        """
+        if "optimizer" not in state:
+            self.reset()
+            return
+        if str(state["optimizer"]) != self.name:
+            raise ValueError
+        self.scale = float(state["optimizer_scale"])
+        self._steps = [int(steps) for steps in state["optimizer_steps"]]
+        self._state = []
+        for layer_number in range(len(self._steps)):
+            if f"optimizer_{layer_number}_0" not in state:
+                self._state.append(None)
+                continue
+            self._state.append(
+                [np.array(state[f"optimizer_{layer_number}_{array_number}"],
+                          dtype=float)
+                 for array_number in range(self.num_state_arrays)])
+
+
+class SGD(Optimizer):
+    """Plain gradient descent, the rule the neurodes use."""
+
+    name = "sgd"
+
+    def update(self, layer_number: int, weights: np.ndarray,
+               adjustment: np.ndarray, learning_rates: np.ndarray):
+        weights += (learning_rates * self.scale) * adjustment
+
+
+class Momentum(Optimizer):
+    """Gradient descent that keeps moving in the direction it has been.
+
+    Each weight keeps a velocity, the sum of its adjustments with older
+    ones shrunk by momentum every update.
+    """
+
+    name = "momentum"
+    num_state_arrays = 1
+
+    def __init__(self, momentum=0.9):
+        """Create a Momentum optimizer.
+
+        :param momentum: how much of the velocity is kept each update
+        :raises ValueError: if momentum is not in [0, 1)
+        """
+        if not 0 <= momentum < 1:
+            raise ValueError
+        super().__init__()
+        self.momentum = momentum
+
+    def update(self, layer_number: int, weights: np.ndarray,
+               adjustment: np.ndarray, learning_rates: np.ndarray):
+        velocity, = self._layer_state(layer_number, weights)
+        velocity *= self.momentum
+        velocity += adjustment
+        weights += (learning_rates * self.scale) * velocity
+
+
+class Adam(Optimizer):
+    """Adaptive moment estimation.
+
+    Each weight keeps running averages of its adjustments and of their
+    squares, and moves by the first over the square root of the second,
+    so every weight takes steps of about the learning rate.
+    """
+
+    name = "adam"
+    num_state_arrays = 2
+
+    def __init__(self, beta_one=0.9, beta_two=0.999, epsilon=1e-8):
+        """Create an Adam optimizer.
+
+        :param beta_one: how much of the average adjustment is kept
+            each update
+        :param beta_two: how much of the average squared adjustment is
+            kept each update
+        :param epsilon: small value keeping the steps finite
+        :raises ValueError: if a beta is not in [0, 1) or epsilon is not
+            positive
+        """
+        if not (0 <= beta_one < 1 and 0 <= beta_two < 1 and epsilon > 0):
+            raise ValueError
+        super().__init__()
+        self.beta_one = beta_one
+        self.beta_two = beta_two
+        self.epsilon = epsilon
+
+    def update(self, layer_number: int, weights: np.ndarray,
+               adjustment: np.ndarray, learning_rates: np.ndarray):
+        first, second = self._layer_state(layer_number, weights)
+        steps = self._count_step(layer_number)
+        first *= self.beta_one
+        first += (1 - self.beta_one) * adjustment
+        second *= self.beta_two
+        second += (1 - self.beta_two) * np.square(adjustment)
+        step = first / (1 - self.beta_one ** steps)
+        step /= np.sqrt(second / (1 - self.beta_two ** steps)) + self.epsilon
+        weights += (learning_rates * self.scale) * step
@@ -0,0 +1,98 @@
+"""This module contains the PrefetchLoader class.
+
+A PrefetchLoader walks an NNData pool on a worker thread and prepares
+the next batches while the current one is being trained on. NumPy
+releases the GIL while it gathers rows, so preparing data overlaps the
+calculations of the training loop.
+"""
+
+import queue
+import threading
+from NNData import NNData, Order, Set
+
+
+class PrefetchLoader:
+    """Prepare batches from an NNData on a background thread."""
+
+    _END = object()
+
+    def __init__(self, data_set: NNData, batch_size=1, order=Order.SHUFFLE,
+                 target_set=Set.TRAIN, depth=2):
+        """Create a PrefetchLoader.
+
+        :param data_set: the data to load batches from
+        :param batch_size: largest number of pairs in a batch
+        :param order: used to either shuffle the pool or keep in order
+        :param target_set: which pool to load batches from
+        :param depth: number of batches prepared ahead of the one in
+            use
+        :raises ValueError: if batch_size or depth is less than 1
+        """
+        if batch_size < 1 or depth < 1:
+            raise ValueError
+        self._data_set = data_set
+        self._batch_size = batch_size
+        self._order = order
+        self._target_set = target_set
+        self._depth = depth
+
+    def _work(self, batches: queue.Queue, stop: threading.Event):
+        """Gather every batch of one pass into a ring of buffers and
+        queue it.
+
+        The worker can fill one buffer while depth batches wait in the
+        queue and one is in use, so a ring of depth + 2 buffers is never
+        overwritten while it is still being read. Each batch is gathered
+        straight into its buffer, so it is copied only once.
+
+        :param batches: queue the batches are put in
+        :param stop: set when the consumer no longer wants batches
+        """
+        try:
+            for batch in self._data_set.iter_batches(
+                    self._target_set, self._batch_size, self._order,
+                    num_buffers=self._depth + 2):
+                if not self._put(batches, stop, batch):
+                    return
+            self._put(batches, stop, PrefetchLoader._END)
+        except Exception as error:
+            self._put(batches, stop, error)
+
+    @staticmethod
+    def _put(batches: queue.Queue, stop: threading.Event, item):
+        """Put item in batches, giving up if the consumer stops.
+
+        :return: True if item was queued
+        """
+        while not stop.is_set():
+            try:
+                batches.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def __iter__(self):
+        """Yield the batches of one pass through the pool.
+
+        Each batch is a tuple of two 2-D arrays that stays valid until
+        the next batch is asked for.
+
+        :raises Exception: whatever the worker thread raised
+        """
+        batches = queue.Queue(maxsize=self._depth)
+        stop = threading.Event()
+        worker = threading.Thread(target=self._work, args=(batches, stop),
+                                  daemon=True)
+        worker.start()
+        try:
+            while True:
+                item = batches.get()
+                if item is PrefetchLoader._END:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            worker.join()
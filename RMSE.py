@@ -1,44 +1,65 @@
 import copy
 import math
 from abc import ABC, abstractmethod
+import numpy as np
 
 
 class RMSE(ABC):
-    """Root-mean-squared-error calculator."""
+    """Root-mean-squared-error calculator.
+
+    Only the running sum of squared distances and the number of
+    entries are kept, so memory use does not grow with the epoch.
+    """
     def __init__(self):
         """Initialize the RMSE class."""
-        self._expected_list = []
-        self._predicted_list = []
+        self._sum_of_squares = 0.0
+        self._count = 0
+
+    def _accumulate(self, other):
+        """Add the squared distances of other to the running sum.
+
+        :param tuple other: Tuple of (expected, predicted), each either
+            one vector or a 2-D array with one vector per row
+        """
+        expected, predicted = other
+        if np.ndim(expected) < 2:
+            self._sum_of_squares += self.distance(expected, predicted)**2
+            self._count += 1
+        else:
+            distances = self.distances(np.asarray(expected, dtype=float),
+                                       np.asarray(predicted, dtype=float))
+            self._sum_of_squares += float(np.dot(distances, distances))
+            self._count += len(distances)
 
     def __add__(self, other):
         """Add a new entry of expected, predicted values.
         
         :param tuple other: Tuple of two tuples with 
-            (expected, predicted)
+            (expected, predicted), or of two 2-D arrays with one entry
+            per row
         :returns RMSE: new error object with parameter 'other' 
             incorporated.
         """
-        new_obj = copy.deepcopy(self)
-        new_obj._expected_list.append(other[0])
-        new_obj._predicted_list.append(other[1])
+        new_obj = copy.copy(self)
+        new_obj._accumulate(other)
         return new_obj
 
     def __iadd__(self, other):
         """Add a new entry of expected, predicted values.
 
         :param tuple other: Tuple of two tuples with 
-            (expected, predicted)
+            (expected, predicted), or of two 2-D arrays with one entry
+            per row
         :returns RMSE: modified error object with parameter 'other' 
             incorporated.
         """
-        self._expected_list.append(other[0])
-        self._predicted_list.append(other[1])
+        self._accumulate(other)
         return self
 
     def reset(self):
         """Reset error object."""
-        self._expected_list = []
-        self._predicted_list = []
+        self._sum_of_squares = 0.0
+        self._count = 0
 
     @property
     def error(self):
@@ -46,12 +67,9 @@ class RMSE(ABC):
         
         :returns float: RMSE
         """
-        if len(self._expected_list) == 0:
+        if self._count == 0:
             return 0
-        sum_of_squares = 0
-        for item in zip(self._expected_list, self._predicted_list):
-            sum_of_squares += self.distance(item[0], item[1])**2
-        return math.sqrt(sum_of_squares / len(self._expected_list))
+        return math.sqrt(self._sum_of_squares / self._count)
 
     @staticmethod
     @abstractmethod
@@ -64,6 +82,17 @@ class RMSE(ABC):
         """
         pass
 
+    @staticmethod
+    @abstractmethod
+    def distances(vectors_one, vectors_two):
+        """Calculate the distance of every pair of rows.
+
+        :param np.ndarray vectors_one: 2-D array, one vector per row
+        :param np.ndarray vectors_two: 2-D array, one vector per row
+        :returns np.ndarray: distance between each pair of rows
+        """
+        pass
+
 
 class Euclidean(RMSE):
 
@@ -80,6 +109,18 @@ class Euclidean(RMSE):
         sum_of_squares = sum(squared_diffs)
         return math.sqrt(sum_of_squares)
 
+    @staticmethod
+    def distances(vectors_one, vectors_two):
+        """Calculate Euclidean distance of every pair of rows.
+
+        :param np.ndarray vectors_one: 2-D array, one vector per row
+        :param np.ndarray vectors_two: 2-D array, one vector per row
+        :returns np.ndarray: Euclidean distance between each pair of
+            rows
+        """
+        diffs = vectors_one - vectors_two
+        return np.sqrt(np.einsum('ij,ij->i', diffs, diffs))
+
 
 class Taxicab(RMSE):
     @staticmethod
@@ -93,3 +134,13 @@ class Taxicab(RMSE):
         """
         abs_diffs = [abs(a-b) for a, b in zip(vector_one, vector_two)]
         return sum(abs_diffs)
+
+    @staticmethod
+    def distances(vectors_one, vectors_two):
+        """Calculate Taxicab distance of every pair of rows.
+
+        :param np.ndarray vectors_one: 2-D array, one vector per row
+        :param np.ndarray vectors_two: 2-D array, one vector per row
+        :returns np.ndarray: Taxicab distance between each pair of rows
+        """
+        return np.abs(vectors_one - vectors_two).sum(axis=1)
@@ -0,0 +1,82 @@
+"""This module contains the learning-rate schedules.
+
+A schedule gives, for each epoch, the factor every learning rate is
+multiplied by, so training can take large steps early on and smaller
+ones as it settles.
+"""
+
+import math
+from abc import ABC, abstractmethod
+
+
+class Schedule(ABC):
+    """Learning-rate factor for each epoch."""
+
+    @abstractmethod
+    def factor(self, epoch: int):
+        """Return the factor the learning rates are multiplied by.
+
+        :param epoch: number of epochs run before this one
+        :return: float
+        """
+        pass
+
+
+class StepDecay(Schedule):
+    """Multiply the learning rates by gamma every step_size epochs."""
+
+    def __init__(self, step_size: int, gamma=0.5):
+        """Create a StepDecay schedule.
+
+        :param step_size: number of epochs between decays
+        :param gamma: factor applied at every decay
+        :raises ValueError: if step_size is less than 1 or gamma is not
+            positive
+        """
+        if step_size < 1 or gamma <= 0:
+            raise ValueError
+        self.step_size = step_size
+        self.gamma = gamma
+
+    def factor(self, epoch: int):
+        return self.gamma ** (epoch // self.step_size)
+
+
+class ExponentialDecay(Schedule):
+    """Multiply the learning rates by gamma every epoch."""
+
+    def __init__(self, gamma: float):
+        """Create an ExponentialDecay schedule.
+
+        :param gamma: factor applied every epoch
+        :raises ValueError: if gamma is not positive
+        """
+        if gamma <= 0:
+            raise ValueError
+        self.gamma = gamma
+
+    def factor(self, epoch: int):
+        return self.gamma ** epoch
+
+
+class CosineDecay(Schedule):
+    """Lower the learning rates along half a cosine over some epochs."""
+
+    def __init__(self, epochs: int, minimum=0.0):
+        """Create a CosineDecay schedule.
+
+        :param epochs: number of epochs the decay takes, after which the
+            factor stays at minimum
+        :param minimum: smallest factor
+        :raises ValueError: if epochs is less than 1 or minimum is not
+            in [0, 1]
+        """
+        if epochs < 1 or not 0 <= minimum <= 1:
+            raise ValueError
+        self.epochs = epochs
+        self.minimum = minimum
+
+    def factor(self, epoch: int):
+        progress = min(epoch, self.epochs) / self.epochs
+        return self.minimum + (1 - self.minimum) * \
+            (1 + math.cos(math.pi * progress)) / 2
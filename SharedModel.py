@@ -0,0 +1,170 @@
+"""This module contains the SharedModel class.
+
+A SharedModel places the weight matrices of a trained network in one
+block of shared memory, so any number of worker processes can attach to
+it and predict without building a LayerList of neurodes or copying the
+weights. The block describes itself: it starts with the layer sizes and
+activations, followed by the matrices, so attaching needs only its name.
+Pickling a SharedModel pickles just that name, so it can be handed to
+the workers of a process pool as it is.
+"""
+
+import json
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+from Activation import get_activation
+from MatrixEngine import MatrixEngine
+from WeightSnapshot import WeightSnapshot
+
+_HEADER_ALIGNMENT = 8
+
+
+class SharedModel:
+    """Read-only network whose weights live in shared memory."""
+
+    def __init__(self, memory: shared_memory.SharedMemory, owner: bool):
+        """Read the layout of a shared memory block and view its weights.
+
+        Use create or attach instead of calling this directly.
+
+        :param memory: the block holding the model
+        :param owner: whether this process created the block
+        :raises ValueError: if the block does not hold a model
+        """
+        self._memory = memory
+        self._owner = owner
+        try:
+            header_length = int(np.frombuffer(memory.buf, np.int64, 1)[0])
+            if not 0 <= header_length <= memory.size - 8:
+                raise ValueError
+            header = json.loads(bytes(memory.buf[8:8 + header_length]))
+            layer_sizes = [int(size) for size in header["layer_sizes"]]
+            activations = [get_activation(name)
+                           for name in header["activations"]]
+            if len(layer_sizes) < 2 or min(layer_sizes) < 1:
+                raise ValueError
+            # the matrices must fit in the block after the header
+            offset = SharedModel._aligned(8 + header_length)
+            matrices_size = sum(num_columns * num_rows * 8
+                                for num_columns, num_rows
+                                in zip(layer_sizes, layer_sizes[1:]))
+            if offset + matrices_size > memory.size:
+                raise ValueError
+        except (ValueError, KeyError, TypeError):
+            self.close()
+            raise ValueError
+        weights = []
+        for num_columns, num_rows in zip(layer_sizes, layer_sizes[1:]):
+            matrix = np.ndarray((num_rows, num_columns), dtype=float,
+                                buffer=memory.buf, offset=offset)
+            matrix.setflags(write=False)
+            weights.append(matrix)
+            offset += matrix.nbytes
+        self._weights = tuple(weights)
+        self._activations = tuple(activations)
+
+    @staticmethod
+    def _aligned(offset: int):
+        """Round offset up so the matrices after it are aligned."""
+        return -(-offset // _HEADER_ALIGNMENT) * _HEADER_ALIGNMENT
+
+    @classmethod
+    def create(cls, snapshot: WeightSnapshot, name=None):
+        """Copy a snapshot of a network into a new shared memory block.
+
+        The block stays until unlink is called, even after this process
+        closes it.
+
+        :param snapshot: the weights to share, as returned by
+            FFBPNetwork.publish_snapshot
+        :param name: name of the block, or None for a unique one
+        :return: SharedModel owning the block
+        """
+        weights = snapshot.weights
+        layer_sizes = [weights[0].shape[1]] + [matrix.shape[0]
+                                               for matrix in weights]
+        header = json.dumps({
+            "layer_sizes": layer_sizes,
+            "activations": [activation.name
+                            for activation in snapshot.activations]
+        }).encode()
+        offset = SharedModel._aligned(8 + len(header))
+        size = offset + sum(matrix.nbytes for matrix in weights)
+        memory = shared_memory.SharedMemory(name, create=True, size=size)
+        np.frombuffer(memory.buf, np.int64, 1)[0] = len(header)
+        memory.buf[8:8 + len(header)] = header
+        for matrix in weights:
+            np.ndarray(matrix.shape, dtype=float, buffer=memory.buf,
+                       offset=offset)[...] = matrix
+            offset += matrix.nbytes
+        return cls(memory, True)
+
+    @classmethod
+    def attach(cls, name):
+        """Attach to a block made by create, without copying it.
+
+        :param name: name of the block
+        :return: SharedModel reading the block
+        :raises FileNotFoundError: if there is no block called name
+        :raises ValueError: if the block does not hold a model
+        """
+        # only the creator may unlink the block, so an attaching process
+        # must not register it with a resource tracker, which would
+        # unlink it when the process exits
+        try:
+            memory = shared_memory.SharedMemory(name, track=False)
+        except TypeError:
+            # before Python 3.13 attaching always registers the block
+            register = resource_tracker.register
+            resource_tracker.register = lambda name, rtype: None
+            try:
+                memory = shared_memory.SharedMemory(name)
+            finally:
+                resource_tracker.register = register
+        return cls(memory, False)
+
+    def __reduce__(self):
+        """Pickle the name of the block only, to attach to it again."""
+        return SharedModel.attach, (self.name,)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        if self._owner:
+            self.unlink()
+
+    @property
+    def name(self):
+        """Return the name of the shared memory block."""
+        return self._memory.name
+
+    @property
+    def weights(self):
+        """Return the read-only weight matrices, input side first."""
+        return self._weights
+
+    def predict(self, features):
+        """Return the outputs of the model for many samples.
+
+        :param features: 2-D array-like with one sample per row
+        :return: 2-D array with one row of outputs per sample
+        :raises ValueError: if features is not 2-D or the rows do not
+            have one value per input neurode
+        """
+        features = np.asarray(features, dtype=float)
+        if (features.ndim != 2 or
+                features.shape[1] != self._weights[0].shape[1]):
+            raise ValueError
+        return MatrixEngine.forward_only(self._weights, self._activations,
+                                         features)
+
+    def close(self):
+        """Stop using the block in this process."""
+        self._weights = ()
+        self._memory.close()
+
+    def unlink(self):
+        """Free the block once every process has closed it."""
+        self._memory.unlink()
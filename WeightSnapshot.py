@@ -0,0 +1,64 @@
+"""This module contains the WeightSnapshot class.
+
+A WeightSnapshot is a read-only copy of the weights of a network, taken
+while it trains. Training keeps changing its own weight matrices in
+place, and publishes a new snapshot by swapping one reference, so other
+threads can predict from the latest snapshot at any time without a lock
+and without ever seeing a half-updated matrix.
+"""
+
+import numpy as np
+from MatrixEngine import MatrixEngine
+
+
+class WeightSnapshot:
+    """Read-only copy of a network's weights that can predict."""
+
+    def __init__(self, all_weights, activations, version: int):
+        """Create a WeightSnapshot from copies of the weight matrices.
+
+        :param all_weights: weight matrix of every layer after the
+            input layer, input side first
+        :param activations: Activation subclass of every layer after
+            the input layer
+        :param version: number of snapshots published before this one
+        """
+        copies = []
+        for weights in all_weights:
+            weights = weights.copy()
+            weights.setflags(write=False)
+            copies.append(weights)
+        self._weights = tuple(copies)
+        self._activations = tuple(activations)
+        self._version = version
+
+    @property
+    def weights(self):
+        """Return the read-only weight matrices, input side first."""
+        return self._weights
+
+    @property
+    def activations(self):
+        """Return the Activation subclass of every layer after the input
+        layer."""
+        return self._activations
+
+    @property
+    def version(self):
+        """Return the number of snapshots published before this one."""
+        return self._version
+
+    def predict(self, features):
+        """Return the outputs of the snapshot for many samples.
+
+        :param features: 2-D array-like with one sample per row
+        :return: 2-D array with one row of outputs per sample
+        :raises ValueError: if features is not 2-D or the rows do not
+            have one value per input neurode
+        """
+        features = np.asarray(features, dtype=float)
+        if (features.ndim != 2 or
+                features.shape[1] != self._weights[0].shape[1]):
+            raise ValueError
+        return MatrixEngine.forward_only(self._weights, self._activations,
+                                         features)